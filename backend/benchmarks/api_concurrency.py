@@ -0,0 +1,150 @@
+"""
+Measure API latency under parallel load.
+
+Run from the backend directory:
+    python -m benchmarks.api_concurrency [--mentions 20000] [--concurrency 32] [--requests 400]
+    python -m benchmarks.api_concurrency --url http://localhost:8000
+
+Without --url the app is served in-process against a throwaway SQLite database
+seeded with synthetic mentions. Slow search requests run alongside cheap ones,
+so blocking the event loop shows up as a high p99 on /health and /mentions.
+Run it on two checkouts to compare before and after a change; it only needs
+the packages in requirements.txt and seeds any version of the schema.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import requests
+
+# (path, params) mix; searches scan text and are the slow requests
+REQUEST_MIX = [
+    ("/health", {}),
+    ("/mentions", {"limit": 20}),
+    ("/mentions/search", {"q": "battery", "sortBy": "sentiment_score", "pagination": "offset"}),
+    ("/mentions/search", {"q": "support", "sentiment": "negative", "pagination": "offset"}),
+]
+
+WORDS = ["battery", "support", "launch", "pricing", "update", "crash", "great", "awful", "shipping", "design"]
+
+def seed_database(count: int):
+    from database import SessionLocal, create_tables
+    from models import Mention
+    
+    create_tables()
+    rng = random.Random(7)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(count):
+        rows.append({
+            "text": " ".join(rng.choice(WORDS) for _ in range(12)) + f" #{i}",
+            "platform": rng.choice(["reddit", "hackernews", "rss", "news"]),
+            "url": f"https://example.com/bench/{i}",
+            "sentiment": rng.choice(["positive", "negative", "neutral"]),
+            "sentiment_score": rng.uniform(-1, 1),
+            "topics": "",
+            "created_at": now - timedelta(minutes=rng.randint(0, 7 * 24 * 60)),
+            "inserted_at": now
+        })
+    
+    db = SessionLocal()
+    try:
+        db.execute(Mention.__table__.insert(), rows)
+        db.commit()
+        # Checkouts with hourly rollups serve /stats from them; older ones have none to fill
+        try:
+            from services.rollups import rebuild_rollups
+        except ImportError:
+            pass
+        else:
+            rebuild_rollups(db)
+    finally:
+        db.close()
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def start_server(port: int) -> str:
+    """Serve the app from a background thread with its own event loop, like a uvicorn worker"""
+    import uvicorn
+    import main
+    import database
+    from anyio import to_thread
+    
+    # Lifespan is skipped so the scheduler does not start fetching; the thread
+    # pool it would have sized (on checkouts that size it) is sized here instead
+    threadpool_size = getattr(database, "DB_THREADPOOL_SIZE", None)
+    
+    async def app(scope, receive, send):
+        if threadpool_size:
+            to_thread.current_default_thread_limiter().total_tokens = threadpool_size
+        await main.app(scope, receive, send)
+    
+    server = uvicorn.Server(uvicorn.Config(app, port=port, lifespan="off", log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+def run_load(base_url: str, concurrency: int, total: int) -> Dict[str, List[float]]:
+    """Send total requests from concurrency threads, each with its own keep-alive session"""
+    latencies = {path: [] for path, _ in REQUEST_MIX}
+    local = threading.local()
+    
+    def send(index: int):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        path, params = REQUEST_MIX[index % len(REQUEST_MIX)]
+        start = time.perf_counter()
+        response = session.get(base_url + path, params=params, timeout=120)
+        response.raise_for_status()
+        latencies[path].append((time.perf_counter() - start) * 1000)
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(send, index) for index in range(total)]:
+            future.result()
+    return latencies
+
+def benchmark(args):
+    base_url = args.url.rstrip("/") if args.url else start_server(args.port)
+    
+    run_load(base_url, args.concurrency, len(REQUEST_MIX))
+    start = time.perf_counter()
+    latencies = run_load(base_url, args.concurrency, args.requests)
+    elapsed = time.perf_counter() - start
+    
+    print(f"{'endpoint':<20} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for path, values in latencies.items():
+        print(f"{path:<20} {len(values):>5} {statistics.median(values):>9.1f} {percentile(values, 95):>9.1f} "
+              f"{percentile(values, 99):>9.1f} {max(values):>9.1f}")
+    print(f"{args.requests / elapsed:.0f} requests/s at concurrency {args.concurrency}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="benchmark a running server instead of an in-process app")
+    parser.add_argument("--port", type=int, default=8765, help="port for the in-process server")
+    parser.add_argument("--mentions", type=int, default=20000, help="synthetic mentions to seed (in-process only)")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight at once")
+    parser.add_argument("--requests", type=int, default=400, help="timed requests, spread evenly over the mix")
+    args = parser.parse_args()
+    
+    if not args.url:
+        # Must be set before the database module is imported
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+        os.environ.setdefault("RESPONSE_CACHE_TTL", "0")
+        seed_database(args.mentions)
+    
+    benchmark(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare sentiment engine tiers on throughput and label agreement.
+
+Run from the backend directory:
+    python -m benchmarks.sentiment_engines [--from-db] [--limit 2000] [--repeat 3]
+
+Agreement is measured against the "ensemble" tier, which is the reference behavior.
+"""
+import argparse
+import random
+import time
+from typing import List
+
+from services.sentiment_analyzer import ENGINES, SentimentAnalyzer
+
+SHORT_TEXTS = [
+    "Love the new release, works great",
+    "This update broke everything, awful",
+    "Shipping was slow but support was helpful",
+    "Meh, it's fine I guess",
+    "Worst customer service I have ever had",
+    "Honestly impressed by the battery life",
+]
+
+LONG_TEXTS = [
+    "I have been using this product for about three months now and while the onboarding was confusing "
+    "the day to day experience has been smooth, the team fixed most bugs I reported and the pricing feels fair",
+    "After the latest update the app keeps crashing whenever I open the settings page, support keeps sending "
+    "canned replies and nobody seems to read the logs I attach, I am seriously considering switching providers",
+    "The launch event was mostly about incremental changes, some nice polish on the interface and a couple of "
+    "new integrations, nothing that will change how most people use it but nothing to complain about either",
+]
+
+def synthetic_corpus(size: int) -> List[str]:
+    rng = random.Random(42)
+    pool = SHORT_TEXTS + LONG_TEXTS
+    # Suffix keeps every text distinct so no engine benefits from repeats
+    return [f"{rng.choice(pool)} #{i}" for i in range(size)]
+
+def db_corpus(size: int) -> List[str]:
+    from database import SessionLocal
+    from models import Mention
+    
+    db = SessionLocal()
+    try:
+        return [text for (text,) in db.query(Mention.text).limit(size)]
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from-db", action="store_true", help="use stored mention texts instead of a synthetic corpus")
+    parser.add_argument("--limit", type=int, default=2000, help="number of texts to score")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per engine, best run is reported")
+    args = parser.parse_args()
+    
+    texts = db_corpus(args.limit) if args.from_db else synthetic_corpus(args.limit)
+    if not texts:
+        print("No texts to score")
+        return
+    
+    # Single process and no cache, so the numbers reflect the models alone
+    analyzer = SentimentAnalyzer(workers=1, cache=None)
+    
+    labels = {}
+    print(f"{'engine':<10} {'texts/s':>10} {'agreement':>10}")
+    for engine in ("ensemble",) + tuple(e for e in ENGINES if e != "ensemble"):
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = analyzer.analyze_many(texts, engine)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        
+        labels[engine] = [label for label, _ in results]
+        agreement = sum(a == b for a, b in zip(labels[engine], labels["ensemble"])) / len(texts)
+        print(f"{engine:<10} {len(texts) / best:>10.0f} {agreement:>10.1%}")
+
+if __name__ == "__main__":
+    main()
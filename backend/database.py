@@ -1,6 +1,7 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.declarative import declarative_base
+from typing import Any, Dict, List
 import os
 from dotenv import load_dotenv
 
@@ -8,10 +9,66 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./brand_monitoring.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# Endpoints use sync sessions, so FastAPI runs them on this many worker threads
+# instead of the event loop
+DB_THREADPOOL_SIZE = int(os.getenv("DB_THREADPOOL_SIZE", "40"))
+
+# Connection pool; the defaults cover DB_THREADPOOL_SIZE so request threads do
+# not queue for a connection
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# SQLite storage profile: WAL lets reads proceed during ingest commits, and
+# busy_timeout makes writers wait for the lock instead of failing
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Postgres per-session limits in milliseconds (0 leaves the server default)
+PG_STATEMENT_TIMEOUT_MS = int(os.getenv("PG_STATEMENT_TIMEOUT_MS", "0"))
+PG_LOCK_TIMEOUT_MS = int(os.getenv("PG_LOCK_TIMEOUT_MS", "0"))
+
+def _engine_options(url: str) -> dict:
+    if url.startswith("sqlite"):
+        options = {"connect_args": {"check_same_thread": False}}
+        # In-memory databases live in a single connection, so they keep the default pool
+        if ":memory:" not in url and url.rstrip("/") not in ("sqlite:", "sqlite+pysqlite:"):
+            options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+        return options
+    
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True
+    }
+    if url.startswith("postgresql"):
+        settings = []
+        if PG_STATEMENT_TIMEOUT_MS > 0:
+            settings.append(f"-c statement_timeout={PG_STATEMENT_TIMEOUT_MS}")
+        if PG_LOCK_TIMEOUT_MS > 0:
+            settings.append(f"-c lock_timeout={PG_LOCK_TIMEOUT_MS}")
+        if settings:
+            options["connect_args"] = {"options": " ".join(settings)}
+    return options
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.close()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -22,6 +79,33 @@ def get_db():
     finally:
         db.close()
 
+def dialect_insert(db: Session, model):
+    """INSERT construct for the session's dialect, exposing ON CONFLICT where supported"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy import insert
+    return insert(model)
+
+def insert_new_rows(db: Session, table, rows: List[Dict[str, Any]], key: str) -> List[Dict[str, Any]]:
+    """Insert rows, skipping those whose unique key column is already taken, and return the ones inserted"""
+    stmt = dialect_insert(db, table)
+    if not hasattr(stmt, "on_conflict_do_nothing"):
+        # Without ON CONFLICT a taken key fails the whole statement, so all rows land or none do
+        db.execute(stmt, rows)
+        return rows
+    stmt = stmt.on_conflict_do_nothing(index_elements=[key])
+    if db.get_bind().dialect.insert_executemany_returning:
+        inserted = set(db.execute(stmt.returning(table.c[key]), rows).scalars())
+        return [row for row in rows if row[key] in inserted]
+    # Older SQLite has no RETURNING; one statement per row still reports what it inserted
+    return [row for row in rows if db.execute(stmt, row).rowcount]
+
 def create_tables():
     from models import Base
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    from services.search import setup_full_text_search
+    Base.metadata.create_all(bind=engine)
+    setup_full_text_search(engine)
\ No newline at end of file
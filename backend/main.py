@@ -1,25 +1,41 @@
 from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, desc, func, or_
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional
+from anyio import to_thread
 import uvicorn
 import logging
 import json
+import csv
+import io
 
-from database import get_db, create_tables
-from models import Mention, Alert, Topic, KeywordSearch
+from database import get_db, create_tables, DB_THREADPOOL_SIZE
+from models import Mention, Alert, Topic, KeywordSearch, MentionHourlyRollup
 from schemas import (
     MentionCreate, MentionResponse, MentionFilters,
     AlertCreate, AlertResponse, TopicResponse,
     KeywordSearchCreate, KeywordSearchResponse,
     SentimentAnalysis
 )
-from services.sentiment_analyzer import SentimentAnalyzer
+from services.sentiment_analyzer import SentimentAnalyzer, shutdown_pool
+from services.sentiment_cache import sentiment_cache
+from services.http_cache import http_cache
+from services.resilience import upstream_guard
+from services.http_client import http_client
+from services.rollups import record_mentions, ensure_rollups, hour_of
+from services.pagination import keyset_page, count_cache
+from services.search import apply_text_search
+from services.response_cache import response_cache, notify_data_changed
+from services.topics import topic_tracker, extract_topics, format_topics
+from services.near_duplicates import near_duplicates
+from services.url_filter import url_filter, canonical_url
 from services.spike_detector import SpikeDetector
-from services.data_sources import DataSourceManager
-from services.scheduler import task_runner
+from services.ingest_queue import ingest_queue
+from services.bulk_import import import_ndjson
+from services.scheduler import task_runner, data_source_manager
 # from services.mock_data import MockDataGenerator
 
 from database import SessionLocal
@@ -51,12 +67,22 @@ from contextlib import asynccontextmanager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    to_thread.current_default_thread_limiter().total_tokens = DB_THREADPOOL_SIZE
     create_tables()
+    db = SessionLocal()
+    try:
+        ensure_rollups(db)
+    finally:
+        db.close()
     task_runner.start()
     logger.info("Background task runner started")
     yield
     # Shutdown
     task_runner.stop()
+    ingest_queue.stop()
+    url_filter.save()
+    http_client.close()
+    shutdown_pool()
     logger.info("Background task runner stopped")
 
 app = FastAPI(
@@ -76,19 +102,45 @@ app.add_middleware(
 
 # Initialize services
 sentiment_analyzer = SentimentAnalyzer()
-data_source_manager = DataSourceManager()
 # mock_generator = MockDataGenerator()
 
+# Columns usable as cursor pagination keys; NULL scores sort as -2 so (value, id) order is total
+KEYSET_SORT_COLUMNS = {
+    "created_at": Mention.created_at,
+    "inserted_at": Mention.inserted_at,
+    "id": Mention.id,
+    "sentiment_score": func.coalesce(Mention.sentiment_score, -2.0),
+    "platform": Mention.platform,
+    "sentiment": Mention.sentiment
+}
+
+def _cursor_page(query, count_key, sort_name: str, descending: bool, cursor: Optional[str], limit: int, include_total: Optional[bool]):
+    """Keyset page of mentions sorted by a KEYSET_SORT_COLUMNS key; the total is only counted for a first page that asks for it"""
+    try:
+        mentions, next_cursor = keyset_page(query, KEYSET_SORT_COLUMNS[sort_name], Mention.id, descending, cursor, limit, sort_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    pagination = {"limit": limit, "next_cursor": next_cursor}
+    if include_total and not cursor:
+        pagination["total"] = count_cache.count(count_key, query)
+    
+    return {"data": mentions, "pagination": pagination}
+
 # Mentions endpoints
 @app.get("/mentions")
-async def get_mentions(
+def get_mentions(
     sentiment: Optional[str] = None,
     platform: Optional[str] = None,
     limit: int = 20,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    pagination: str = "offset",
+    include_total: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
-    """Get brand mentions with pagination and filtering"""
+    """Get brand mentions with pagination and filtering.
+    Pass pagination=cursor (or a cursor from a previous page) for keyset pagination"""
     # Validate pagination parameters
     if limit > 100:
         raise HTTPException(status_code=400, detail="Limit cannot exceed 100")
@@ -103,8 +155,12 @@ async def get_mentions(
     if sentiment:
         query = query.filter(Mention.sentiment == sentiment)
     
-    # Get total count for pagination
-    total = query.count()
+    count_key = ("mentions", platform, sentiment)
+    if cursor or pagination == "cursor":
+        return _cursor_page(query, count_key, "created_at", True, cursor, limit, include_total)
+    
+    # Get total count for pagination, cached briefly across page requests
+    total = count_cache.count(count_key, query) if include_total is not False else None
     
     # Get paginated results
     mentions = query.order_by(desc(Mention.created_at)).offset(offset).limit(limit).all()
@@ -115,12 +171,12 @@ async def get_mentions(
             "total": total,
             "limit": limit,
             "offset": offset,
-            "pages": (total + limit - 1) // limit
+            "pages": (total + limit - 1) // limit if total is not None else None
         }
     }
 
 @app.post("/mentions", response_model=MentionResponse)
-async def create_mention(mention: MentionCreate, db: Session = Depends(get_db)):
+def create_mention(mention: MentionCreate, db: Session = Depends(get_db)):
     """Create a new mention with automatic sentiment analysis"""
     try:
         
@@ -137,16 +193,26 @@ async def create_mention(mention: MentionCreate, db: Session = Depends(get_db)):
             mention.sentiment_score = score
             logger.info(f"Analyzed sentiment: {sentiment} (score: {score})")
         
-        # Check for duplicate URL
-        existing = db.query(Mention).filter(Mention.url == mention.url).first()
-        if existing:
+        if not mention.topics:
+            mention.topics = format_topics(extract_topics(mention.text))
+        
+        # Check for duplicate URL; the URL filter spares the lookup for URLs it has never seen,
+        # and a hit is confirmed so a false positive never rejects a hand-entered mention
+        raw_url = mention.url
+        mention.url = canonical_url(raw_url)
+        if url_filter.find_stored(db, {mention.url: [raw_url]}, confirm=True):
             logger.warning(f"Duplicate URL detected: {mention.url}")
             raise HTTPException(status_code=400, detail="Mention with this URL already exists")
         
         db_mention = Mention(**mention.dict())
         db.add(db_mention)
+        record_mentions(db, [mention.dict()])
         db.commit()
         db.refresh(db_mention)
+        topic_tracker.observe([mention.dict()])
+        near_duplicates.add([mention.dict()])
+        url_filter.add([mention.url])
+        notify_data_changed()
         
         logger.info(f"Created mention with ID: {db_mention.id}")
         return db_mention
@@ -156,40 +222,46 @@ async def create_mention(mention: MentionCreate, db: Session = Depends(get_db)):
         logger.error(f"Request data: {mention.dict() if mention else 'None'}")
         raise HTTPException(status_code=422, detail=f"Validation error: {str(e)}")
 
+@app.post("/mentions/bulk")
+async def bulk_create_mentions(request: Request, errors_only: bool = False):
+    """Import mentions from a streamed NDJSON body, one MentionCreate object per line.
+    Lines are validated as they arrive and written in chunked transactions; the response
+    reports accepted, duplicate and rejected lines (only the latter two with errors_only)"""
+    return await import_ndjson(request.stream(), sentiment_analyzer, errors_only)
+
 @app.get("/mentions/stats")
-async def get_mention_stats(
+def get_mention_stats(
     days: int = 7,
     db: Session = Depends(get_db)
 ):
     """Get mention statistics for the dashboard"""
-    start_date = datetime.now(timezone.utc) - timedelta(days=days)
+    return response_cache.get_or_compute(("mentions/stats", days), lambda: _mention_stats(days, db))
+
+def _mention_stats(days: int, db: Session):
+    # Read from the hourly rollups, so cost depends on hours shown rather than mentions stored
+    start_hour = hour_of(datetime.now(timezone.utc) - timedelta(days=days))
+    in_range = MentionHourlyRollup.hour >= start_hour
     
     # Total mentions
-    total = db.query(Mention).filter(Mention.created_at >= start_date).count()
+    total = db.query(func.sum(MentionHourlyRollup.mention_count)).filter(in_range).scalar() or 0
     
     # Sentiment breakdown
     sentiment_stats = db.query(
-        Mention.sentiment,
-        func.count(Mention.id).label('count')
-    ).filter(
-        Mention.created_at >= start_date
-    ).group_by(Mention.sentiment).all()
+        MentionHourlyRollup.sentiment,
+        func.sum(MentionHourlyRollup.mention_count).label('count')
+    ).filter(in_range).group_by(MentionHourlyRollup.sentiment).all()
     
     # Platform breakdown
     platform_stats = db.query(
-        Mention.platform,
-        func.count(Mention.id).label('count')
-    ).filter(
-        Mention.created_at >= start_date
-    ).group_by(Mention.platform).all()
+        MentionHourlyRollup.platform,
+        func.sum(MentionHourlyRollup.mention_count).label('count')
+    ).filter(in_range).group_by(MentionHourlyRollup.platform).all()
     
     # Daily trend
     daily_stats = db.query(
-        func.date(Mention.created_at).label('date'),
-        func.count(Mention.id).label('count')
-    ).filter(
-        Mention.created_at >= start_date
-    ).group_by(func.date(Mention.created_at)).all()
+        func.date(MentionHourlyRollup.hour).label('date'),
+        func.sum(MentionHourlyRollup.mention_count).label('count')
+    ).filter(in_range).group_by(func.date(MentionHourlyRollup.hour)).all()
     
     return {
         "total_mentions": total,
@@ -200,14 +272,17 @@ async def get_mention_stats(
 
 # Sentiment analysis endpoint
 @app.post("/analyze-sentiment", response_model=SentimentAnalysis)
-async def analyze_sentiment(text: str):
-    """Analyze sentiment of provided text"""
-    sentiment, score = sentiment_analyzer.analyze(text)
+def analyze_sentiment(text: str, engine: Optional[str] = None):
+    """Analyze sentiment of provided text, optionally with a specific engine tier (fast, ensemble, accurate)"""
+    try:
+        sentiment, score = sentiment_analyzer.analyze(text, engine)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return SentimentAnalysis(text=text, sentiment=sentiment, score=score)
 
 # Alerts endpoints
 @app.get("/alerts", response_model=List[AlertResponse])
-async def get_alerts(
+def get_alerts(
     resolved: Optional[bool] = None,
     limit: int = 50,
     db: Session = Depends(get_db)
@@ -222,7 +297,7 @@ async def get_alerts(
     return alerts
 
 @app.post("/alerts/check")
-async def check_for_alerts(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+def check_for_alerts(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """Check for spikes and create alerts"""
     spike_detector = SpikeDetector(db)
     alert_data_list = spike_detector.detect_spikes()
@@ -244,10 +319,13 @@ async def check_for_alerts(background_tasks: BackgroundTasks, db: Session = Depe
             db.refresh(db_alert)
             created_alerts.append(db_alert)
     
+    if created_alerts:
+        notify_data_changed()
+    
     return {"alerts_created": len(created_alerts), "alerts": created_alerts}
 
 @app.patch("/alerts/{alert_id}/resolve")
-async def resolve_alert(alert_id: int, db: Session = Depends(get_db)):
+def resolve_alert(alert_id: int, db: Session = Depends(get_db)):
     """Mark an alert as resolved"""
     alert = db.query(Alert).filter(Alert.id == alert_id).first()
     if not alert:
@@ -255,40 +333,27 @@ async def resolve_alert(alert_id: int, db: Session = Depends(get_db)):
     
     alert.resolved = True
     db.commit()
+    notify_data_changed()
     return {"message": "Alert resolved"}
 
 # Data fetching endpoints
 @app.post("/fetch-live-data")
-async def fetch_live_data(
+def fetch_live_data(
     brand_keywords: List[str],
     background_tasks: BackgroundTasks,
     limit_per_source: int = 50,
     db: Session = Depends(get_db)
 ):
     """Fetch live data from external sources"""
-    mentions_data = data_source_manager.fetch_all_mentions(brand_keywords, limit_per_source)
-    
-    created_count = 0
-    for mention_data in mentions_data:
-        # Check for duplicates
-        existing = db.query(Mention).filter(Mention.url == mention_data["url"]).first()
-        if existing:
-            continue
-        
-        # Analyze sentiment
-        sentiment, score = sentiment_analyzer.analyze(mention_data["text"])
-        mention_data["sentiment"] = sentiment
-        mention_data["sentiment_score"] = score
-        
-        # Create mention
-        db_mention = Mention(**mention_data)
-        db.add(db_mention)
-        created_count += 1
+    # Ad-hoc keywords are not persisted, so the mentions are not tied to a keyword search
+    keyword_searches = [KeywordSearch(keyword=keyword) for keyword in brand_keywords]
+    mentions_data = data_source_manager.collect_mentions(keyword_searches, limit_per_source)
     
-    db.commit()
+    # The ingest writer dedupes, scores and inserts the batch alongside scheduled fetches
+    created_count = ingest_queue.write(mentions_data)
     
     # Schedule spike detection
-    background_tasks.add_task(check_for_alerts, db)
+    background_tasks.add_task(check_for_alerts, background_tasks, db)
     
     return {"message": f"Fetched {created_count} new mentions", "total_fetched": len(mentions_data)}
 
@@ -298,8 +363,49 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "ok"}
 
+@app.get("/metrics")
+async def get_metrics():
+    """Runtime counters for caches and ingest"""
+    return {
+        "sentiment_cache": sentiment_cache.stats(),
+        "http_cache": http_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "ingest": ingest_queue.stats(),
+        "upstreams": upstream_guard.stats(),
+        "http_client": http_client.stats(),
+        "topics": topic_tracker.stats(),
+        "near_duplicates": near_duplicates.stats(),
+        "url_filter": url_filter.stats()
+    }
+
+def _filter_mentions(query, db: Session, q: Optional[str], sentiment: Optional[str], platform: Optional[str],
+                     startDate: Optional[str], endDate: Optional[str]):
+    """Apply the search filters to a mention query; returns (query, relevance expression or None)"""
+    relevance = None
+    if q:
+        query, relevance = apply_text_search(query, db, q)
+    if sentiment:
+        query = query.filter(Mention.sentiment == sentiment)
+    if platform:
+        query = query.filter(Mention.platform == platform)
+    if startDate:
+        start_dt = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
+        query = query.filter(Mention.created_at >= start_dt)
+    if endDate:
+        end_dt = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
+        query = query.filter(Mention.created_at <= end_dt)
+    return query, relevance
+
+def _sort_mentions(query, relevance, sortBy: str, sortOrder: str):
+    if sortBy == "relevance" and relevance is not None:
+        return query.order_by(relevance, desc(Mention.created_at))
+    sort_column = getattr(Mention, sortBy, Mention.created_at)
+    if sortOrder == "desc":
+        return query.order_by(desc(sort_column))
+    return query.order_by(sort_column)
+
 @app.get("/mentions/search")
-async def search_mentions(
+def search_mentions(
     q: Optional[str] = None,
     sentiment: Optional[str] = None,
     platform: Optional[str] = None,
@@ -309,32 +415,24 @@ async def search_mentions(
     sortOrder: str = "desc",
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    pagination: str = "offset",
+    include_total: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
-    """Advanced search with multiple filters"""
-    query = db.query(Mention)
+    """Advanced search with multiple filters.
+    q supports "exact phrases" and prefix* words; sortBy=relevance ranks full-text matches.
+    Pass pagination=cursor (or a cursor from a previous page) for keyset pagination"""
+    query, relevance = _filter_mentions(db.query(Mention), db, q, sentiment, platform, startDate, endDate)
     
-    if q:
-        query = query.filter(Mention.text.contains(q))
-    if sentiment:
-        query = query.filter(Mention.sentiment == sentiment)
-    if platform:
-        query = query.filter(Mention.platform == platform)
-    if startDate:
-        start_dt = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
-        query = query.filter(Mention.created_at >= start_dt)
-    if endDate:
-        end_dt = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
-        query = query.filter(Mention.created_at <= end_dt)
+    count_key = ("search", q, sentiment, platform, startDate, endDate)
+    if cursor or pagination == "cursor":
+        sort_name = sortBy if sortBy in KEYSET_SORT_COLUMNS else "created_at"
+        return _cursor_page(query, count_key, sort_name, sortOrder == "desc", cursor, limit, include_total)
     
-    # Sorting
-    sort_column = getattr(Mention, sortBy, Mention.created_at)
-    if sortOrder == "desc":
-        query = query.order_by(desc(sort_column))
-    else:
-        query = query.order_by(sort_column)
+    total = count_cache.count(count_key, query) if include_total is not False else None
     
-    total = query.count()
+    query = _sort_mentions(query, relevance, sortBy, sortOrder)
     mentions = query.offset(offset).limit(limit).all()
     
     return {
@@ -343,12 +441,84 @@ async def search_mentions(
             "total": total,
             "limit": limit,
             "offset": offset,
-            "pages": (total + limit - 1) // limit
+            "pages": (total + limit - 1) // limit if total is not None else None
         }
     }
 
+# Columns written by /mentions/export, in output order
+EXPORT_COLUMNS = [
+    Mention.id, Mention.text, Mention.platform, Mention.url, Mention.sentiment, Mention.sentiment_score,
+    Mention.topics, Mention.keyword_search_id, Mention.created_at, Mention.inserted_at
+]
+
+# Rows fetched from the database cursor at a time; output is flushed once per batch
+EXPORT_BATCH_SIZE = 1000
+
+def _stream_export(db: Session, query, format: str):
+    """Yield the export in chunks of EXPORT_BATCH_SIZE rows, closing db when done"""
+    names = [column.key for column in EXPORT_COLUMNS]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if format == "csv" else None
+    try:
+        if writer:
+            writer.writerow(names)
+        
+        pending = 0
+        for row in query.execution_options(yield_per=EXPORT_BATCH_SIZE):
+            if writer:
+                writer.writerow(value.isoformat() if isinstance(value, datetime) else value for value in row)
+            else:
+                record = {name: value.isoformat() if isinstance(value, datetime) else value for name, value in zip(names, row)}
+                buffer.write(json.dumps(record) + "\n")
+            pending += 1
+            if pending >= EXPORT_BATCH_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+@app.get("/mentions/export")
+def export_mentions(
+    format: str = "ndjson",
+    q: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    platform: Optional[str] = None,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    sortBy: str = "created_at",
+    sortOrder: str = "desc",
+    limit: Optional[int] = None
+):
+    """Stream every mention matching the search filters as NDJSON or CSV.
+    Rows are read in batches from a database cursor, so memory use does not grow with the export"""
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    
+    # The stream outlives the request dependencies, so it owns its session
+    db = SessionLocal()
+    try:
+        query, relevance = _filter_mentions(db.query(*EXPORT_COLUMNS), db, q, sentiment, platform, startDate, endDate)
+        query = _sort_mentions(query, relevance, sortBy, sortOrder)
+        if limit is not None:
+            query = query.limit(limit)
+    except Exception:
+        db.close()
+        raise
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_export(db, query, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="mentions.{format}"'}
+    )
+
 @app.post("/keywords", response_model=KeywordSearchResponse)
-async def add_keyword(keyword: KeywordSearchCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+def add_keyword(keyword: KeywordSearchCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """Add a new keyword search entry and fetch mentions immediately"""
     try:
         logger.info(f"Adding keyword: {keyword.model_dump()}")
@@ -358,8 +528,9 @@ async def add_keyword(keyword: KeywordSearchCreate, background_tasks: Background
         db.commit()
         db.refresh(db_keyword)
         
-        # Fetch mentions for this keyword immediately in background
+        # Fetch mentions for this keyword immediately in background, then once per interval
         background_tasks.add_task(fetch_mentions_for_new_keyword, db_keyword.id)
+        task_runner.add_keyword_job(db_keyword.id)
         
         logger.info(f"Created keyword with ID: {db_keyword.id} - fetching mentions in background")
         return db_keyword
@@ -369,7 +540,7 @@ async def add_keyword(keyword: KeywordSearchCreate, background_tasks: Background
         raise HTTPException(status_code=422, detail=f"Validation error: {str(e)}")
 
 @app.get("/keywords")
-async def get_keywords(
+def get_keywords(
     limit: int = 20,
     offset: int = 0,
     db: Session = Depends(get_db)
@@ -400,7 +571,7 @@ async def get_keywords(
     }
 
 @app.delete("/keywords/{keyword_id}")
-async def delete_keyword(keyword_id: int, db: Session = Depends(get_db)):
+def delete_keyword(keyword_id: int, db: Session = Depends(get_db)):
     """Delete a keyword search"""
     keyword = db.query(KeywordSearch).filter(KeywordSearch.id == keyword_id).first()
     if not keyword:
@@ -408,12 +579,16 @@ async def delete_keyword(keyword_id: int, db: Session = Depends(get_db)):
     
     keyword.is_active = False
     db.commit()
+    task_runner.remove_keyword_job(keyword_id)
     return {"message": "Keyword deleted"}
 
 @app.get("/stats")
-async def get_stats(db: Session = Depends(get_db)):
+def get_stats(db: Session = Depends(get_db)):
     """Get overall statistics"""
-    stats = await get_mention_stats(7, db)
+    return response_cache.get_or_compute(("stats",), lambda: _overall_stats(db))
+
+def _overall_stats(db: Session):
+    stats = response_cache.get_or_compute(("mentions/stats", 7), lambda: _mention_stats(7, db))
     
     # Get recent alerts
     recent_alerts = db.query(Alert).filter(Alert.resolved == False).order_by(desc(Alert.created_at)).limit(5).all()
@@ -433,34 +608,40 @@ async def get_stats(db: Session = Depends(get_db)):
     }
 
 @app.get("/trends")
-async def get_trends(db: Session = Depends(get_db)):
+def get_trends(db: Session = Depends(get_db)):
     """Get 7-day trend data"""
+    return response_cache.get_or_compute(("trends",), lambda: _trends(db))
+
+def _trends(db: Session):
     end_date = datetime.now(timezone.utc)
     start_date = end_date - timedelta(days=7)
+    # Windows are whole rollup hours; the last one closes after the current hour
+    window_end = hour_of(end_date) + timedelta(hours=1)
+    window_start = window_end - timedelta(days=7)
+    
+    # One grouped read of the hourly rollups, bucketed into days below
+    hourly_counts = db.query(
+        MentionHourlyRollup.hour,
+        MentionHourlyRollup.sentiment,
+        func.sum(MentionHourlyRollup.mention_count).label('count')
+    ).filter(
+        MentionHourlyRollup.hour >= window_start,
+        MentionHourlyRollup.hour < window_end
+    ).group_by(MentionHourlyRollup.hour, MentionHourlyRollup.sentiment).all()
     
     trends = []
     for i in range(7):
-        day_start = start_date + timedelta(days=i)
+        day_start = window_start + timedelta(days=i)
         day_end = day_start + timedelta(days=1)
         
-        # Total count for the day
-        total_count = db.query(Mention).filter(
-            and_(Mention.created_at >= day_start, Mention.created_at < day_end)
-        ).count()
-        
-        # Sentiment breakdown for the day
-        sentiment_counts = db.query(
-            Mention.sentiment,
-            func.count(Mention.id).label('count')
-        ).filter(
-            and_(Mention.created_at >= day_start, Mention.created_at < day_end)
-        ).group_by(Mention.sentiment).all()
-        
-        sentiment_dict = {s.sentiment: s.count for s in sentiment_counts}
+        sentiment_dict = {}
+        for row in hourly_counts:
+            if day_start <= row.hour < day_end:
+                sentiment_dict[row.sentiment] = sentiment_dict.get(row.sentiment, 0) + row.count
         
         trends.append({
-            "date": day_start.strftime("%Y-%m-%d"),
-            "count": total_count,
+            "date": (start_date + timedelta(days=i)).strftime("%Y-%m-%d"),
+            "count": sum(sentiment_dict.values()),
             "positive": sentiment_dict.get("positive", 0),
             "negative": sentiment_dict.get("negative", 0),
             "neutral": sentiment_dict.get("neutral", 0)
@@ -491,10 +672,12 @@ async def get_trends(db: Session = Depends(get_db)):
 
 # Topics endpoint
 @app.get("/topics", response_model=List[TopicResponse])
-async def get_trending_topics(limit: int = 20, db: Session = Depends(get_db)):
+def get_trending_topics(limit: int = 20, db: Session = Depends(get_db)):
     """Get trending topics"""
-    topics = db.query(Topic).order_by(desc(Topic.mention_count)).limit(limit).all()
-    return topics
+    return response_cache.get_or_compute(
+        ("topics", limit),
+        lambda: [TopicResponse.model_validate(topic) for topic in db.query(Topic).order_by(desc(Topic.mention_count)).limit(limit).all()]
+    )
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
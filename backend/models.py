@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, JSON, Index, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, JSON, Index, ForeignKey, LargeBinary, PrimaryKeyConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -53,4 +53,56 @@ class Topic(Base):
     name = Column(String(100), unique=True, nullable=False)
     mention_count = Column(Integer, default=0)
     last_mentioned = Column(DateTime)
-    sentiment_avg = Column(Float)
\ No newline at end of file
+    sentiment_avg = Column(Float)
+
+class SentimentCacheEntry(Base):
+    __tablename__ = "sentiment_cache"
+    
+    key = Column(String(64), primary_key=True)
+    version = Column(String(50), nullable=False, index=True)
+    sentiment = Column(String(20), nullable=False)
+    sentiment_score = Column(Float, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class HttpCacheEntry(Base):
+    __tablename__ = "http_cache"
+    
+    key = Column(String(64), primary_key=True)
+    url = Column(String(2000), nullable=False)
+    etag = Column(String(500), nullable=True)
+    last_modified = Column(String(100), nullable=True)
+    body = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class FetchCursor(Base):
+    __tablename__ = "fetch_cursors"
+    __table_args__ = (PrimaryKeyConstraint("keyword_search_id", "source"),)
+    
+    keyword_search_id = Column(Integer, ForeignKey("keyword_search.id"), nullable=False)
+    source = Column(String(50), nullable=False)
+    last_seen_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class KeywordPollState(Base):
+    __tablename__ = "keyword_poll_state"
+    __table_args__ = (PrimaryKeyConstraint("keyword_search_id", "source"),)
+    
+    keyword_search_id = Column(Integer, ForeignKey("keyword_search.id"), nullable=False)
+    source = Column(String(50), nullable=False)
+    interval_seconds = Column(Float, nullable=False)
+    # Smoothed new mentions per hour observed from this source
+    mention_rate = Column(Float, nullable=False, default=0.0)
+    last_polled_at = Column(DateTime, nullable=True)
+    next_poll_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class MentionHourlyRollup(Base):
+    __tablename__ = "mention_hourly_rollups"
+    __table_args__ = (PrimaryKeyConstraint("hour", "platform", "sentiment", "keyword_search_id"),)
+    
+    hour = Column(DateTime, nullable=False, index=True)
+    platform = Column(String(50), nullable=False)
+    sentiment = Column(String(20), nullable=False)
+    keyword_search_id = Column(Integer, nullable=False, default=0)  # 0 when the mention has no keyword search
+    mention_count = Column(Integer, nullable=False, default=0)
+    sentiment_score_sum = Column(Float, nullable=False, default=0.0)
@@ -0,0 +1,172 @@
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import os
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from database import insert_new_rows
+from models import Mention
+from schemas import MentionCreate
+from services.data_sources import INGEST_LOOKUP_CHUNK
+from services.rollups import record_mentions
+from services.response_cache import notify_data_changed
+from services.topics import topic_tracker, extract_topics, format_topics
+from services.near_duplicates import near_duplicates
+from services.url_filter import url_filter, canonical_url
+from services.ingest_queue import ingest_queue
+from services.sentiment_analyzer import SentimentAnalyzer
+
+# Valid records are written in transactions of this many lines; lines longer
+# than BULK_MAX_LINE_BYTES are rejected without being parsed
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+BULK_MAX_LINE_BYTES = int(os.getenv("BULK_MAX_LINE_BYTES", str(64 * 1024)))
+
+def parse_line(line: bytes) -> Tuple[Optional[MentionCreate], Optional[str]]:
+    """Validate one NDJSON line; returns (record, None) or (None, error)"""
+    if len(line) > BULK_MAX_LINE_BYTES:
+        return None, f"line exceeds {BULK_MAX_LINE_BYTES} bytes"
+    try:
+        return MentionCreate.model_validate_json(line), None
+    except ValidationError as e:
+        return None, "; ".join(f"{'.'.join(str(part) for part in error['loc']) or 'line'}: {error['msg']}" for error in e.errors())
+
+def import_chunk(db: Session, records: List[Tuple[int, MentionCreate]], analyzer: SentimentAnalyzer) -> Dict[int, str]:
+    """Dedupe, score and insert one chunk of validated records in a single transaction.
+    Returns "accepted" or "duplicate" keyed by line number; near-duplicates say which URL they repeat"""
+    statuses = {}
+    unique = {}
+    spellings = {}
+    for line_number, record in records:
+        raw = record.url
+        record.url = canonical_url(raw)
+        spellings.setdefault(record.url, set()).add(raw)
+        if record.url in unique:
+            statuses[line_number] = "duplicate"
+        else:
+            unique[record.url] = (line_number, record)
+    
+    existing = url_filter.find_stored(db, spellings, INGEST_LOOKUP_CHUNK)
+    for url in existing:
+        statuses[unique[url][0]] = "duplicate"
+    candidates = [
+        {"text": record.text, "url": url, "line_number": line_number, "record": record}
+        for url, (line_number, record) in unique.items() if url not in existing
+    ]
+    kept, collapsed = near_duplicates.split(candidates)
+    for candidate, original in collapsed:
+        statuses[candidate["line_number"]] = f"duplicate: near-duplicate of {original}"
+    new_records = [(candidate["line_number"], candidate["record"]) for candidate in kept]
+    if not new_records:
+        return statuses
+    
+    # Records that arrive with a sentiment keep it, the rest are scored in one batch
+    unscored = [record for _, record in new_records if not record.sentiment or record.sentiment_score is None]
+    scores = dict(zip((id(record) for record in unscored), analyzer.analyze_many([record.text for record in unscored])))
+    
+    inserted_at = datetime.now(timezone.utc)
+    rows = []
+    for line_number, record in new_records:
+        sentiment, sentiment_score = scores.get(id(record), (record.sentiment, record.sentiment_score))
+        rows.append({
+            "text": record.text,
+            "platform": record.platform,
+            "url": record.url,
+            "keyword_search_id": None,
+            "sentiment": sentiment,
+            "sentiment_score": sentiment_score,
+            "topics": record.topics or format_topics(extract_topics(record.text)),
+            "created_at": record.created_at or inserted_at,
+            "inserted_at": inserted_at
+        })
+        statuses[line_number] = "accepted"
+    
+    # A concurrent writer may have stored some of these URLs since the lookup
+    inserted = {row["url"] for row in insert_new_rows(db, Mention.__table__, rows, "url")}
+    for candidate in kept:
+        if candidate["url"] not in inserted:
+            statuses[candidate["line_number"]] = "duplicate"
+    rows = [row for row in rows if row["url"] in inserted]
+    record_mentions(db, rows)
+    db.commit()
+    topic_tracker.observe(rows)
+    near_duplicates.add([candidate for candidate in kept if candidate["url"] in inserted])
+    url_filter.add(candidate["url"] for candidate in kept)
+    # Per chunk, so readers see a long import as it lands
+    notify_data_changed()
+    return statuses
+
+def _write_chunk(records: List[Tuple[int, MentionCreate]], analyzer: SentimentAnalyzer) -> Dict[int, str]:
+    # Chunks are written by the ingest writer thread, between fetch batches, so
+    # the single-writer guarantee covers bulk imports too
+    try:
+        return ingest_queue.run(lambda db: import_chunk(db, records, analyzer))
+    except Exception as e:
+        return {line_number: f"error: {e}" for line_number, _ in records}
+
+async def import_ndjson(body: AsyncIterator[bytes], analyzer: SentimentAnalyzer, errors_only: bool = False) -> Dict[str, Any]:
+    """Read an NDJSON stream of MentionCreate records and import it chunk by chunk.
+    Only one chunk of records is held at a time; DB work runs on the thread pool"""
+    results = []
+    totals = {"accepted": 0, "duplicate": 0, "rejected": 0}
+    pending: List[Tuple[int, MentionCreate]] = []
+    
+    def report(line_number: int, status: str, error: Optional[str] = None):
+        kind = status.split(":", 1)[0]
+        if kind not in totals:
+            kind = "rejected"
+        totals[kind] += 1
+        if errors_only and kind == "accepted":
+            return
+        entry = {"line": line_number, "status": kind}
+        if error or kind != status:
+            entry["error"] = error or status.split(": ", 1)[-1]
+        results.append(entry)
+    
+    async def flush():
+        statuses = await run_in_threadpool(_write_chunk, pending, analyzer)
+        for line_number, _ in pending:
+            report(line_number, statuses.get(line_number, "accepted"))
+        pending.clear()
+    
+    async def handle(line_number: int, line: bytes):
+        if not line.strip():
+            return
+        record, error = parse_line(line)
+        if record is None:
+            report(line_number, "rejected", error)
+            return
+        pending.append((line_number, record))
+        if len(pending) >= BULK_CHUNK_SIZE:
+            await flush()
+    
+    buffer = b""
+    oversized = False
+    line_number = 0
+    async for data in body:
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if oversized:
+                # Tail of a line whose start was already dropped
+                report(line_number, "rejected", f"line exceeds {BULK_MAX_LINE_BYTES} bytes")
+                oversized = False
+            else:
+                await handle(line_number, line)
+        # Stop buffering a line that can no longer be valid and skip to its newline
+        if len(buffer) > BULK_MAX_LINE_BYTES:
+            buffer = b""
+            oversized = True
+    if oversized:
+        line_number += 1
+        report(line_number, "rejected", f"line exceeds {BULK_MAX_LINE_BYTES} bytes")
+    elif buffer:
+        line_number += 1
+        await handle(line_number, buffer)
+    if pending:
+        await flush()
+    
+    results.sort(key=lambda entry: entry["line"])
+    return {"lines": line_number, **totals, "results": results}
@@ -4,14 +4,24 @@ from datetime import datetime, timedelta, timezone
 from dateutil import parser as date_parser
 import json
 import urllib.parse
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import os
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
-from database import SessionLocal
+from database import SessionLocal, insert_new_rows
 from models import Mention, KeywordSearch
 from services.sentiment_analyzer import SentimentAnalyzer
+from services.keyword_matcher import KeywordMatcher
+from services.http_cache import http_cache
+from services.fetch_cursors import load_cursors, advance_cursors
+from services.rollups import record_mentions
+from services.response_cache import notify_data_changed
+from services.topics import topic_tracker, extract_topics, format_topics
+from services.near_duplicates import near_duplicates
+from services.url_filter import url_filter, canonical_url
 import feedparser
 
 # Twitter scraping removed
@@ -21,48 +31,120 @@ load_dotenv()
 # Configuration
 MAX_RESULTS = 100
 
-def save_mention_to_db(db: Session, text: str, platform: str, url: str, keyword_search_id: int, created_at: datetime, analyzer: SentimentAnalyzer) -> bool:
-    """Save mention directly to database with sentiment analysis"""
+# Concurrent fetch engine limits: a global cap on in-flight fetches plus a
+# per-source cap so one slow upstream cannot take every worker
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "16"))
+SOURCE_CONCURRENCY = {
+    "reddit": int(os.getenv("FETCH_CONCURRENCY_REDDIT", "4")),
+    "hackernews": int(os.getenv("FETCH_CONCURRENCY_HACKERNEWS", "8")),
+    "rss": int(os.getenv("FETCH_CONCURRENCY_RSS", "4")),
+    "news": int(os.getenv("FETCH_CONCURRENCY_NEWS", "4")),
+}
+
+# Candidate URLs are checked against the DB in chunks to stay under bind-parameter limits
+INGEST_LOOKUP_CHUNK = int(os.getenv("INGEST_LOOKUP_CHUNK", "500"))
+
+def save_mentions_to_db(db: Session, mentions: List[Dict[str, Any]], analyzer: SentimentAnalyzer, cursor_source: Optional[str] = None) -> int:
+    """Dedupe, score and insert a batch of candidate mentions with a single commit.
+    Each candidate is a dict with text, platform, url, keyword_search_id and created_at.
+    With cursor_source, the per-keyword fetch cursors for that source advance in the same commit"""
+    return save_mention_batches(db, [(mentions, cursor_source)], analyzer)[0]
+
+def save_mention_batches(db: Session, batches: List[Tuple[List[Dict[str, Any]], Optional[str]]], analyzer: SentimentAnalyzer) -> List[int]:
+    """Write several (mentions, cursor_source) submissions with one lookup, one insert and one commit.
+    Returns the number of new mentions each submission contributed, in batches order.
+    A failed write is rolled back and re-raised, so callers never mistake it for an empty result"""
+    # Dedupe across the whole write on canonical URLs, first occurrence wins
+    unique = {}
+    owners = {}
+    spellings = {}
+    for index, (mentions, _) in enumerate(batches):
+        for mention in mentions:
+            raw = mention.get("url")
+            url = mention["url"] = canonical_url(raw) if raw else raw
+            if not url:
+                continue
+            spellings.setdefault(url, set()).add(raw)
+            if url not in unique:
+                unique[url] = mention
+                owners[url] = index
+    
+    counts = [0] * len(batches)
+    if not unique:
+        return counts
+    
     try:
-        # Check if URL already exists
-        existing = db.query(Mention).filter(Mention.url == url).first()
-        if existing:
-            return False
+        # One IN (...) lookup per chunk; once the URL filter is warm its positives count as stored, unqueried
+        existing = url_filter.find_stored(db, spellings, INGEST_LOOKUP_CHUNK)
         
-        # Analyze sentiment
-        sentiment, sentiment_score = analyzer.analyze(text)
+        for mentions, cursor_source in batches:
+            if cursor_source:
+                advance_cursors(db, cursor_source, mentions)
         
-        mention = Mention(
-            text=text[:1000],
-            platform=platform,
-            url=url,
-            keyword_search_id=keyword_search_id,
-            sentiment=sentiment,
-            sentiment_score=sentiment_score,
-            topics="",
-            created_at=created_at,
-            inserted_at=datetime.now(timezone.utc)
-        )
+        new_mentions = [mention for url, mention in unique.items() if url not in existing]
+        # Syndicated copies of an indexed mention are dropped before they cost a sentiment score
+        new_mentions, collapsed = near_duplicates.split(new_mentions)
+        if not new_mentions:
+            db.commit()
+            return counts
         
-        db.add(mention)
+        # Score the whole batch at once so large batches use every core
+        scores = analyzer.analyze_many([mention["text"] for mention in new_mentions])
+        
+        inserted_at = datetime.now(timezone.utc)
+        rows = []
+        for mention, (sentiment, sentiment_score) in zip(new_mentions, scores):
+            rows.append({
+                "text": mention["text"][:1000],
+                "platform": mention["platform"],
+                "url": mention["url"],
+                "keyword_search_id": mention.get("keyword_search_id"),
+                "sentiment": sentiment,
+                "sentiment_score": sentiment_score,
+                "topics": format_topics(extract_topics(mention["text"])),
+                "created_at": mention.get("created_at") or inserted_at,
+                "inserted_at": inserted_at
+            })
+        
+        # One executemany; ON CONFLICT skips rows a concurrent writer inserted meanwhile,
+        # and only the rows that actually landed are counted and rolled up
+        rows = insert_new_rows(db, Mention.__table__, rows, "url")
+        for row in rows:
+            counts[owners[row["url"]]] += 1
+        record_mentions(db, rows)
         db.commit()
-        return True
+        topic_tracker.observe(rows)
+        inserted = {row["url"] for row in rows}
+        near_duplicates.add([mention for mention in new_mentions if mention["url"] in inserted])
+        url_filter.add(mention["url"] for mention in new_mentions)
+        notify_data_changed()
+        return counts
     except Exception as e:
         db.rollback()
-        print(f"Error saving mention: {e}")
-        return False
+        print(f"Error saving mentions: {e}")
+        raise
 
+def store_mentions(db: Session, mention_lists: List[List[Dict[str, Any]]], analyzer: SentimentAnalyzer, ingest=None, cursor_source: Optional[str] = None) -> List[int]:
+    """Save each list of candidates and return its new mention count.
+    With an ingest queue every list is submitted before waiting, so they share the writer's batches"""
+    if ingest is not None:
+        tickets = [ingest.submit(mentions, cursor_source) for mentions in mention_lists]
+        return [ingest.result(ticket) for ticket in tickets]
+    return [save_mentions_to_db(db, mentions, analyzer, cursor_source) for mentions in mention_lists]
 
 
 class RedditDataSource:
-    def __init__(self, analyzer: SentimentAnalyzer):
+    def __init__(self, analyzer: SentimentAnalyzer, ingest=None):
         self.base_url = "https://www.reddit.com/search.json"
-        self.headers = {'User-Agent': 'BrandMonitor/1.0'}
         self.analyzer = analyzer
+        self.ingest = ingest
     
-    def fetch_mentions(self, db: Session, keyword_search: KeywordSearch, limit: int = MAX_RESULTS) -> int:
-        """Fetch brand mentions from Reddit for specific keyword_search"""
-        saved_count = 0
+    def collect_mentions(self, keyword_search: KeywordSearch, limit: int = MAX_RESULTS, since: Optional[datetime] = None,
+                         conditional: bool = True) -> List[Dict[str, Any]]:
+        """Fetch and parse Reddit posts for specific keyword_search without saving them.
+        Posts come newest first, so parsing stops at the first one not newer than since.
+        An unchanged result (HTTP 304) yields nothing unless conditional is False"""
+        mentions = []
         
         try:
             params = {
@@ -72,8 +154,9 @@ class RedditDataSource:
                 "t": "week"
             }
             
-            response = requests.get(self.base_url, params=params, headers=self.headers, timeout=10)
-            response.raise_for_status()
+            response = http_cache.get("reddit", self.base_url, params=params, conditional=conditional)
+            if response.not_modified:
+                return mentions
             data = response.json()
             
             for post in data.get("data", {}).get("children", []):
@@ -88,30 +171,59 @@ class RedditDataSource:
                 created_at = datetime.fromtimestamp(post_data.get('created_utc', 0))
                 url = f"https://reddit.com{post_data.get('permalink', '')}"
                 
-                if save_mention_to_db(db, text, "reddit", url, keyword_search.id, created_at, self.analyzer):
-                    saved_count += 1
+                if since and created_at <= since:
+                    break
+                
+                mentions.append({
+                    "text": text,
+                    "platform": "reddit",
+                    "url": url,
+                    "keyword_search_id": keyword_search.id,
+                    "created_at": created_at,
+                    "seen_at": created_at
+                })
                 
         except Exception as e:
             print(f"Error fetching Reddit data for {keyword_search.keyword}: {e}")
         
+        return mentions
+    
+    def fetch_mentions(self, db: Session, keyword_search: KeywordSearch, limit: int = MAX_RESULTS) -> int:
+        """Fetch brand mentions from Reddit for specific keyword_search newer than its cursor"""
+        since = load_cursors(db, "reddit", [keyword_search.id]).get(keyword_search.id)
+        # Validators are stored only once the mentions behind them are committed
+        with http_cache.deferred():
+            mentions = self.collect_mentions(keyword_search, limit, since)
+            saved_count = store_mentions(db, [mentions], self.analyzer, self.ingest, cursor_source="reddit")[0]
         print(f"Reddit: Saved {saved_count} mentions for '{keyword_search.keyword}'")
         return saved_count
 
 class HackerNewsDataSource:
-    def __init__(self, analyzer: SentimentAnalyzer):
+    def __init__(self, analyzer: SentimentAnalyzer, ingest=None):
         self.base_url = "https://hn.algolia.com/api/v1/search?query={q}&tags=story&hitsPerPage=50"
         self.analyzer = analyzer
+        self.ingest = ingest
     
-    def fetch_mentions(self, db: Session, keyword_search: KeywordSearch, limit: int = MAX_RESULTS) -> int:
-        """Fetch brand mentions from Hacker News for specific keyword_search"""
-        saved_count = 0
+    def collect_mentions(self, keyword_search: KeywordSearch, limit: int = MAX_RESULTS, since: Optional[datetime] = None,
+                         conditional: bool = True) -> List[Dict[str, Any]]:
+        """Fetch and parse Hacker News stories for specific keyword_search without saving them.
+        With since, Algolia is asked only for stories created after it.
+        An unchanged result (HTTP 304) yields nothing unless conditional is False"""
+        mentions = []
+        matcher = KeywordMatcher([keyword_search.keyword])
         
         try:
             q = requests.utils.quote(keyword_search.keyword)
-            url = self.base_url.format(q=q)
+            key_url = url = self.base_url.format(q=q)
+            if since:
+                # Cursors hold naive UTC, created_at_i is epoch seconds
+                since_ts = int(since.replace(tzinfo=timezone.utc).timestamp())
+                url += "&numericFilters=" + requests.utils.quote(f"created_at_i>{since_ts}")
             
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
+            # Keyed without the cursor, so every poll of this keyword revalidates one entry
+            response = http_cache.get("hackernews", url, key_url=key_url, conditional=conditional)
+            if response.not_modified:
+                return mentions
             data = response.json()
             
             for hit in data.get("hits", [])[:limit]:
@@ -122,7 +234,7 @@ class HackerNewsDataSource:
                 if not text or len(text) < 10:
                     continue
                 
-                if keyword_search.keyword.lower() not in text.lower():
+                if not matcher.find(text):
                     continue
                 
                 url_link = hit.get("url") or f"https://news.ycombinator.com/item?id={hit.get('objectID','')}"
@@ -130,42 +242,62 @@ class HackerNewsDataSource:
                 
                 try:
                     created_at = date_parser.parse(created_at_str).astimezone(timezone.utc).replace(tzinfo=None)
+                    seen_at = created_at
                 except:
                     created_at = datetime.now()
+                    seen_at = None
                 
-                if save_mention_to_db(db, text, "hackernews", url_link, keyword_search.id, created_at, self.analyzer):
-                    saved_count += 1
+                mentions.append({
+                    "text": text,
+                    "platform": "hackernews",
+                    "url": url_link,
+                    "keyword_search_id": keyword_search.id,
+                    "created_at": created_at,
+                    "seen_at": seen_at
+                })
                 
         except Exception as e:
             print(f"Error fetching HackerNews data for {keyword_search.keyword}: {e}")
         
+        return mentions
+    
+    def fetch_mentions(self, db: Session, keyword_search: KeywordSearch, limit: int = MAX_RESULTS) -> int:
+        """Fetch brand mentions from Hacker News for specific keyword_search newer than its cursor"""
+        since = load_cursors(db, "hackernews", [keyword_search.id]).get(keyword_search.id)
+        # Validators are stored only once the mentions behind them are committed
+        with http_cache.deferred():
+            mentions = self.collect_mentions(keyword_search, limit, since)
+            saved_count = store_mentions(db, [mentions], self.analyzer, self.ingest, cursor_source="hackernews")[0]
         print(f"HackerNews: Saved {saved_count} mentions for '{keyword_search.keyword}'")
         return saved_count
 
 class RSSDataSource:
-    def __init__(self, analyzer: SentimentAnalyzer):
+    def __init__(self, analyzer: SentimentAnalyzer, ingest=None):
         self.rss_feeds = [
             "https://techcrunch.com/feed/",
             "https://www.theverge.com/rss/index.xml",
             "https://dev.to/feed"
         ]
         self.analyzer = analyzer
+        self.ingest = ingest
     
-    def fetch_mentions(self, db: Session, keyword_search: KeywordSearch, limit: int = MAX_RESULTS) -> int:
-        """Fetch brand mentions from RSS feeds for specific keyword_search"""
-        saved_count = 0
+    def collect_cycle(self, keyword_searches: List[KeywordSearch], limit: int = MAX_RESULTS, matcher: Optional[KeywordMatcher] = None,
+                      conditional: bool = True, since: Optional[Dict[int, datetime]] = None) -> List[List[Dict[str, Any]]]:
+        """Download each RSS feed once and match every entry against all keywords in one pass.
+        Unchanged feeds (HTTP 304) are skipped unless conditional is False, and entries
+        published no later than a keyword's cursor in since are not offered to it.
+        Returns candidate mentions per keyword, in keyword_searches order"""
+        matcher = matcher or KeywordMatcher([keyword_search.keyword for keyword_search in keyword_searches])
+        mentions = [[] for _ in keyword_searches]
         
-        try:
-            for feed_url in self.rss_feeds:
-                if saved_count >= limit:
-                    break
-                    
-                feed = feedparser.parse(feed_url)
+        for feed_url in self.rss_feeds:
+            try:
+                response = http_cache.get("rss", feed_url, conditional=conditional)
+                if response.not_modified:
+                    continue
+                feed = feedparser.parse(response.content)
                 
                 for entry in feed.entries:
-                    if saved_count >= limit:
-                        break
-                        
                     title = entry.get("title", "")
                     summary = entry.get("summary", "") or entry.get("description", "")
                     content = entry.get("content", [{}])[0].get("value", "")
@@ -174,40 +306,79 @@ class RSSDataSource:
                     if not text or len(text) < 10:
                         continue
                     
-                    if keyword_search.keyword.lower() not in text.lower():
+                    matched = matcher.find(text)
+                    if not matched:
                         continue
                     
                     url_link = entry.get("link", "")
                     
+                    seen_at = None
                     try:
                         published = entry.get("published_parsed")
                         if published:
                             created_at = datetime(*published[:6])
+                            seen_at = created_at
                         else:
                             created_at = datetime.now()
                     except:
                         created_at = datetime.now()
                     
-                    if save_mention_to_db(db, text, "rss", url_link, keyword_search.id, created_at, self.analyzer):
-                        saved_count += 1
+                    # The entry is offered to every keyword it hit
+                    for index in sorted(matched):
+                        keyword_search_id = keyword_searches[index].id
+                        cursor = (since or {}).get(keyword_search_id)
+                        if cursor and seen_at and seen_at <= cursor:
+                            continue
+                        if len(mentions[index]) < limit:
+                            mentions[index].append({
+                                "text": text,
+                                "platform": "rss",
+                                "url": url_link,
+                                "keyword_search_id": keyword_search_id,
+                                "created_at": created_at,
+                                "seen_at": seen_at
+                            })
                 
-        except Exception as e:
-            print(f"Error fetching RSS data for {keyword_search.keyword}: {e}")
+            except Exception as e:
+                print(f"Error fetching RSS feed {feed_url}: {e}")
         
-        print(f"RSS: Saved {saved_count} mentions for '{keyword_search.keyword}'")
-        return saved_count
+        return mentions
+    
+    def collect_mentions(self, keyword_search: KeywordSearch, limit: int = MAX_RESULTS) -> List[Dict[str, Any]]:
+        """Fetch and parse RSS entries for specific keyword_search without saving them"""
+        return self.collect_cycle([keyword_search], limit, conditional=False)[0]
+    
+    def fetch_cycle(self, db: Session, keyword_searches: List[KeywordSearch], limit: int = MAX_RESULTS, matcher: Optional[KeywordMatcher] = None, conditional: bool = True) -> List[int]:
+        """Fetch RSS mentions for many keywords from a single download of each feed,
+        keeping only entries newer than each keyword's cursor"""
+        since = load_cursors(db, "rss", [keyword_search.id for keyword_search in keyword_searches])
+        with http_cache.deferred():
+            mention_lists = self.collect_cycle(keyword_searches, limit, matcher, conditional, since)
+            saved_counts = store_mentions(db, mention_lists, self.analyzer, self.ingest, cursor_source="rss")
+        for keyword_search, saved_count in zip(keyword_searches, saved_counts):
+            print(f"RSS: Saved {saved_count} mentions for '{keyword_search.keyword}'")
+        return saved_counts
+    
+    def fetch_mentions(self, db: Session, keyword_search: KeywordSearch, limit: int = MAX_RESULTS) -> int:
+        """Fetch brand mentions from RSS feeds for specific keyword_search"""
+        return self.fetch_cycle(db, [keyword_search], limit, conditional=False)[0]
 
 class NewsDataSource:
-    def __init__(self, analyzer: SentimentAnalyzer):
+    def __init__(self, analyzer: SentimentAnalyzer, ingest=None):
         self.analyzer = analyzer
+        self.ingest = ingest
     
-    def fetch_mentions(self, db: Session, keyword_search: KeywordSearch, limit: int = MAX_RESULTS) -> int:
-        """Fetch brand mentions from news APIs for specific keyword_search"""
-        saved_count = 0
+    def collect_cycle(self, keyword_searches: List[KeywordSearch], limit: int = MAX_RESULTS, matcher: Optional[KeywordMatcher] = None, conditional: bool = True) -> List[List[Dict[str, Any]]]:
+        """Download the news posts once and match every post against all keywords in one pass.
+        Unchanged feeds (HTTP 304) are skipped unless conditional is False.
+        Returns candidate mentions per keyword, in keyword_searches order"""
+        matcher = matcher or KeywordMatcher([keyword_search.keyword for keyword_search in keyword_searches])
+        mentions = [[] for _ in keyword_searches]
         
         try:
-            response = requests.get("https://jsonplaceholder.typicode.com/posts", timeout=10)
-            response.raise_for_status()
+            response = http_cache.get("news", "https://jsonplaceholder.typicode.com/posts", conditional=conditional)
+            if response.not_modified:
+                return mentions
             posts = response.json()
             
             for post in posts[:limit]:
@@ -215,53 +386,217 @@ class NewsDataSource:
                 body = post.get('body', '')
                 text = f"{title} {body}".strip()
                 
-                if keyword_search.keyword.lower() not in text.lower():
+                matched = matcher.find(text)
+                if not matched:
                     continue
                 
                 url = f"https://example.com/news/{post.get('id', '')}"
                 
-                if save_mention_to_db(db, text, "news", url, keyword_search.id, datetime.now(), self.analyzer):
-                    saved_count += 1
+                for index in sorted(matched):
+                    mentions[index].append({
+                        "text": text,
+                        "platform": "news",
+                        "url": url,
+                        "keyword_search_id": keyword_searches[index].id,
+                        "created_at": datetime.now()
+                    })
                 
         except Exception as e:
             print(f"Error fetching news data: {e}")
         
-        print(f"News: Saved {saved_count} mentions for '{keyword_search.keyword}'")
-        return saved_count
+        return mentions
+    
+    def collect_mentions(self, keyword_search: KeywordSearch, limit: int = MAX_RESULTS) -> List[Dict[str, Any]]:
+        """Fetch and parse news posts for specific keyword_search without saving them"""
+        return self.collect_cycle([keyword_search], limit, conditional=False)[0]
+    
+    def fetch_cycle(self, db: Session, keyword_searches: List[KeywordSearch], limit: int = MAX_RESULTS, matcher: Optional[KeywordMatcher] = None, conditional: bool = True) -> List[int]:
+        """Fetch news mentions for many keywords from a single download.
+        Posts carry no timestamps, so this source keeps no fetch cursors"""
+        with http_cache.deferred():
+            mention_lists = self.collect_cycle(keyword_searches, limit, matcher, conditional)
+            saved_counts = store_mentions(db, mention_lists, self.analyzer, self.ingest)
+        for keyword_search, saved_count in zip(keyword_searches, saved_counts):
+            print(f"News: Saved {saved_count} mentions for '{keyword_search.keyword}'")
+        return saved_counts
+    
+    def fetch_mentions(self, db: Session, keyword_search: KeywordSearch, limit: int = MAX_RESULTS) -> int:
+        """Fetch brand mentions from news APIs for specific keyword_search"""
+        return self.fetch_cycle(db, [keyword_search], limit, conditional=False)[0]
 
 
 
 
 
 class DataSourceManager:
-    def __init__(self):
+    def __init__(self, max_workers: int = FETCH_MAX_WORKERS, source_concurrency: Optional[Dict[str, int]] = None, ingest=None):
+        """With ingest (an IngestQueue), fetchers hand mentions to its single writer instead of writing themselves"""
         self.analyzer = SentimentAnalyzer()
-        self.reddit = RedditDataSource(self.analyzer)
-        self.hackernews = HackerNewsDataSource(self.analyzer)
-        self.rss = RSSDataSource(self.analyzer)
-        self.news = NewsDataSource(self.analyzer)
-    
-    def fetch_all_mentions(self, db: Session, keyword_search: KeywordSearch) -> int:
-        """Fetch mentions from all sources for a specific keyword_search"""
-        total_saved = 0
+        self.ingest = ingest
+        self.reddit = RedditDataSource(self.analyzer, ingest)
+        self.hackernews = HackerNewsDataSource(self.analyzer, ingest)
+        self.rss = RSSDataSource(self.analyzer, ingest)
+        self.news = NewsDataSource(self.analyzer, ingest)
         
-        sources = [
-            self.reddit,
-            self.hackernews, 
-            self.rss,
-            self.news
-        ]
+        # Keyword sources are queried once per keyword; feed sources are
+        # downloaded once per cycle and matched against every keyword
+        self.keyword_sources = {
+            "reddit": self.reddit,
+            "hackernews": self.hackernews
+        }
+        self.feed_sources = {
+            "rss": self.rss,
+            "news": self.news
+        }
+        self.sources = {**self.keyword_sources, **self.feed_sources}
+        
+        # One small pool per source enforces the per-source limit, the shared
+        # semaphore enforces the global one across all pools
+        limits = {**SOURCE_CONCURRENCY, **(source_concurrency or {})}
+        self.global_limit = threading.BoundedSemaphore(max(1, max_workers))
+        self.executors = {
+            name: ThreadPoolExecutor(max_workers=max(1, limits.get(name, 1)), thread_name_prefix=f"fetch-{name}")
+            for name in self.sources
+        }
         
-        for source in sources:
+        # Rebuilt only when the set of keywords changes
+        self._matcher = None
+        self._matcher_lock = threading.Lock()
+    
+    def _matcher_for(self, keyword_searches: List[KeywordSearch]) -> KeywordMatcher:
+        """Keyword automaton for this exact keyword list, reused across cycles"""
+        keywords = [keyword_search.keyword for keyword_search in keyword_searches]
+        with self._matcher_lock:
+            if self._matcher is None or self._matcher.keywords != keywords:
+                self._matcher = KeywordMatcher(keywords)
+            return self._matcher
+    
+    def _fetch_source(self, name: str, keyword_search: KeywordSearch, limit: int) -> int:
+        """Run one keyword source fetch for one keyword in its own DB session"""
+        source = self.sources[name]
+        with self.global_limit:
+            db = SessionLocal()
+            try:
+                return source.fetch_mentions(db, keyword_search, limit=limit)
+            except Exception as e:
+                print(f"Error with {source.__class__.__name__}: {e}")
+                return 0
+            finally:
+                db.close()
+    
+    def _fetch_feed_source(self, name: str, keyword_searches: List[KeywordSearch], limit: int, matcher: KeywordMatcher, conditional: bool) -> List[int]:
+        """Run one feed source fetch for every keyword in its own DB session"""
+        source = self.sources[name]
+        with self.global_limit:
+            db = SessionLocal()
+            try:
+                return source.fetch_cycle(db, keyword_searches, limit=limit, matcher=matcher, conditional=conditional)
+            except Exception as e:
+                print(f"Error with {source.__class__.__name__}: {e}")
+                return [0] * len(keyword_searches)
+            finally:
+                db.close()
+    
+    def _collect_source(self, name: str, keyword_search: KeywordSearch, limit: int) -> List[Dict[str, Any]]:
+        """Collect candidate mentions from one keyword source for one keyword"""
+        source = self.sources[name]
+        with self.global_limit:
             try:
-                saved_count = source.fetch_mentions(db, keyword_search, limit=25)
-                total_saved += saved_count
+                # Nothing is ingested here, so validators are not kept and stored copies are not trusted
+                with http_cache.deferred(keep=False):
+                    return source.collect_mentions(keyword_search, limit=limit, conditional=False)
             except Exception as e:
                 print(f"Error with {source.__class__.__name__}: {e}")
+                return []
+    
+    def _collect_feed_source(self, name: str, keyword_searches: List[KeywordSearch], limit: int, matcher: KeywordMatcher) -> List[Dict[str, Any]]:
+        """Collect candidate mentions from one feed source for every keyword"""
+        source = self.sources[name]
+        with self.global_limit:
+            try:
+                with http_cache.deferred(keep=False):
+                    per_keyword = source.collect_cycle(keyword_searches, limit=limit, matcher=matcher, conditional=False)
+                return [mention for mentions in per_keyword for mention in mentions]
+            except Exception as e:
+                print(f"Error with {source.__class__.__name__}: {e}")
+                return []
+    
+    def collect_mentions(self, keyword_searches: List[KeywordSearch], limit: int = 25) -> List[Dict[str, Any]]:
+        """Collect candidate mentions from all sources concurrently without saving them"""
+        snapshots = [_snapshot_keyword(keyword_search) for keyword_search in keyword_searches]
+        matcher = KeywordMatcher([snapshot.keyword for snapshot in snapshots])
         
-        return total_saved
+        futures = [
+            self.executors[name].submit(self._collect_source, name, snapshot, limit)
+            for snapshot in snapshots
+            for name in self.keyword_sources
+        ]
+        futures += [
+            self.executors[name].submit(self._collect_feed_source, name, snapshots, limit, matcher)
+            for name in self.feed_sources
+        ]
+        
+        mentions = []
+        for future in as_completed(futures):
+            mentions.extend(future.result())
+        return mentions
+    
+    def fetch_keywords_mentions(self, keyword_searches: List[KeywordSearch], limit: int = 25, conditional: bool = True,
+                                sources: Optional[List[str]] = None) -> Dict[int, int]:
+        """Fetch mentions from all sources (or only the named ones) for many keywords concurrently.
+        With conditional set, feeds that have not changed since the last cycle are skipped.
+        Returns saved mention counts keyed by keyword_search id"""
+        # Detach from the caller's session so worker threads never lazy-load through it
+        snapshots = [_snapshot_keyword(keyword_search) for keyword_search in keyword_searches]
+        totals = {snapshot.id: 0 for snapshot in snapshots}
+        keyword_sources = [name for name in self.keyword_sources if sources is None or name in sources]
+        feed_sources = [name for name in self.feed_sources if sources is None or name in sources]
+        
+        keyword_futures = {}
+        for snapshot in snapshots:
+            for name in keyword_sources:
+                future = self.executors[name].submit(self._fetch_source, name, snapshot, limit)
+                keyword_futures[future] = snapshot.id
+        
+        feed_futures = []
+        if feed_sources:
+            matcher = self._matcher_for(snapshots)
+            feed_futures = [
+                self.executors[name].submit(self._fetch_feed_source, name, snapshots, limit, matcher, conditional)
+                for name in feed_sources
+            ]
+        
+        for future in as_completed(list(keyword_futures) + feed_futures):
+            if future in keyword_futures:
+                totals[keyword_futures[future]] += future.result()
+            else:
+                for snapshot, saved_count in zip(snapshots, future.result()):
+                    totals[snapshot.id] += saved_count
+        
+        return totals
+    
+    def fetch_all_mentions(self, db: Session, keyword_search: KeywordSearch) -> int:
+        """Fetch mentions from all sources for a specific keyword_search.
+        Each source runs concurrently with its own session, so db is only used by the caller.
+        Feeds are always read in full, since this keyword has not seen them yet"""
+        return self.fetch_keywords_mentions([keyword_search], conditional=False).get(keyword_search.id, 0)
     
     def fetch_mentions_for_single_keyword(self, db: Session, keyword_search: KeywordSearch) -> int:
         """Fetch mentions for a single keyword immediately"""
         return self.fetch_all_mentions(db, keyword_search)
     
+    def shutdown(self):
+        """Stop the fetch worker pools"""
+        for executor in self.executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _snapshot_keyword(keyword_search: KeywordSearch) -> KeywordSearch:
+    """Transient copy of a keyword search that is safe to share between threads"""
+    return KeywordSearch(
+        id=keyword_search.id,
+        keyword=keyword_search.keyword,
+        platform=keyword_search.platform,
+        sentiment=keyword_search.sentiment,
+        is_active=keyword_search.is_active
+    )
@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List
+from sqlalchemy.orm import Session
+from models import FetchCursor
+
+def load_cursors(db: Session, source: str, keyword_search_ids: Iterable[int]) -> Dict[int, datetime]:
+    """Newest item already seen from source, keyed by keyword_search id"""
+    ids = [keyword_search_id for keyword_search_id in keyword_search_ids if keyword_search_id is not None]
+    if not ids:
+        return {}
+    
+    rows = db.query(FetchCursor).filter(
+        FetchCursor.source == source,
+        FetchCursor.keyword_search_id.in_(ids)
+    )
+    return {row.keyword_search_id: row.last_seen_at for row in rows}
+
+def advance_cursors(db: Session, source: str, mentions: List[Dict[str, Any]]):
+    """Move each keyword's high-water mark for source up to the newest candidate.
+    Only candidates carrying an upstream timestamp in seen_at count; the caller commits"""
+    newest = {}
+    for mention in mentions:
+        keyword_search_id = mention.get("keyword_search_id")
+        seen_at = mention.get("seen_at")
+        if keyword_search_id is None or seen_at is None:
+            continue
+        if keyword_search_id not in newest or seen_at > newest[keyword_search_id]:
+            newest[keyword_search_id] = seen_at
+    
+    if not newest:
+        return
+    
+    current = load_cursors(db, source, newest)
+    updated_at = datetime.now(timezone.utc)
+    for keyword_search_id, seen_at in newest.items():
+        if keyword_search_id in current and current[keyword_search_id] >= seen_at:
+            continue
+        db.merge(FetchCursor(
+            keyword_search_id=keyword_search_id,
+            source=source,
+            last_seen_at=seen_at,
+            updated_at=updated_at
+        ))
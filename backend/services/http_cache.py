@@ -0,0 +1,190 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.parse
+
+from database import SessionLocal
+from models import HttpCacheEntry
+from services.resilience import upstream_guard
+from services.http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+# Conditional requests can be switched off to always fetch full bodies
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+
+# Stored responses older than HTTP_CACHE_TTL_HOURS are dropped, and at most
+# HTTP_CACHE_MAX_ENTRIES are kept (least recently refreshed go first)
+HTTP_CACHE_TTL_HOURS = float(os.getenv("HTTP_CACHE_TTL_HOURS", "24"))
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "1000"))
+
+# Seconds between eviction passes
+PRUNE_INTERVAL = 60
+
+class CachedResponse:
+    """Body of a conditional GET; not_modified means the stored body is still current"""
+    
+    def __init__(self, url: str, status_code: int, content: bytes, not_modified: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.not_modified = not_modified
+    
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+class HTTPResponseCache:
+    """Stores ETag / Last-Modified validators with response bodies and revalidates
+    with If-None-Match / If-Modified-Since, so unchanged upstream data costs a 304"""
+    
+    def __init__(self, enabled: bool = HTTP_CACHE_ENABLED, ttl_hours: float = HTTP_CACHE_TTL_HOURS, max_entries: int = HTTP_CACHE_MAX_ENTRIES):
+        self.enabled = enabled
+        self.ttl = timedelta(hours=ttl_hours)
+        self.max_entries = max(1, max_entries)
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        # Responses fetched inside deferred() on this thread, waiting to be stored
+        self._local = threading.local()
+        self._next_prune = 0.0
+    
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        query = urllib.parse.urlencode(sorted((params or {}).items()), doseq=True)
+        return hashlib.sha256(f"{url}?{query}".encode("utf-8")).hexdigest()
+    
+    @contextmanager
+    def deferred(self, keep: bool = True):
+        """Hold back the validators of responses fetched on this thread inside the block and store
+        them only once it exits without raising (never, with keep False). Wrapping fetch and ingest
+        in one block means a 304 can only ever skip data that was committed"""
+        if getattr(self._local, "pending", None) is not None:
+            # Nested blocks join the outermost one
+            yield
+            return
+        self._local.pending = pending = []
+        try:
+            yield
+        finally:
+            self._local.pending = None
+        if keep:
+            for entry in pending:
+                self._store(*entry)
+    
+    def get(self, source: str, url: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None, conditional: bool = True,
+            key_url: Optional[str] = None) -> CachedResponse:
+        """GET url, revalidating a stored copy when there is one.
+        key_url (url by default) names the stored copy; callers leave per-poll cursors out of it
+        so successive polls revalidate one entry instead of each adding a new one.
+        Raises requests.HTTPError for error statuses like requests.Response.raise_for_status,
+        and CircuitOpenError while the source is being skipped"""
+        key = self.make_key(key_url or url, params)
+        request_headers = dict(headers or {})
+        
+        entry = self._load(key) if self.enabled else None
+        if entry and conditional:
+            if entry.etag:
+                request_headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request_headers["If-Modified-Since"] = entry.last_modified
+        
+        # Rate limits, retries and the circuit breaker are applied per source
+        response = upstream_guard.call(
+            source, url,
+            lambda: http_client.get(url, params=params, headers=request_headers, timeout=timeout)
+        )
+        
+        if response.status_code == 304 and entry:
+            self._record(source, not_modified=True, downloaded=0, saved=len(entry.body))
+            return CachedResponse(url, 304, entry.body, not_modified=True)
+        
+        response.raise_for_status()
+        content = response.content
+        self._record(source, not_modified=False, downloaded=len(content), saved=0)
+        
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if self.enabled and (etag or last_modified):
+            pending = getattr(self._local, "pending", None)
+            if pending is not None:
+                pending.append((key, key_url or url, etag, last_modified, content))
+            else:
+                self._store(key, key_url or url, etag, last_modified, content)
+        
+        return CachedResponse(url, response.status_code, content)
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                source: {
+                    **counters,
+                    "hit_rate": round(counters["not_modified"] / counters["requests"], 3) if counters["requests"] else 0.0
+                }
+                for source, counters in self._stats.items()
+            }
+    
+    def _record(self, source: str, not_modified: bool, downloaded: int, saved: int):
+        with self._lock:
+            counters = self._stats.setdefault(source, {"requests": 0, "not_modified": 0, "bytes_downloaded": 0, "bytes_saved": 0})
+            counters["requests"] += 1
+            counters["not_modified"] += int(not_modified)
+            counters["bytes_downloaded"] += downloaded
+            counters["bytes_saved"] += saved
+    
+    def _load(self, key: str) -> Optional[HttpCacheEntry]:
+        db = SessionLocal()
+        try:
+            entry = db.query(HttpCacheEntry).filter(HttpCacheEntry.key == key).first()
+            if entry is None or entry.updated_at < self._expires_before():
+                return None
+            db.expunge(entry)
+            return entry
+        except Exception as e:
+            logger.error(f"Error reading HTTP cache: {e}")
+            return None
+        finally:
+            db.close()
+    
+    def _store(self, key: str, url: str, etag: Optional[str], last_modified: Optional[str], body: bytes):
+        db = SessionLocal()
+        try:
+            db.merge(HttpCacheEntry(
+                key=key,
+                url=url[:2000],
+                etag=etag,
+                last_modified=last_modified,
+                body=body,
+                updated_at=datetime.now(timezone.utc).replace(tzinfo=None)
+            ))
+            db.commit()
+            if time.monotonic() >= self._next_prune:
+                self._next_prune = time.monotonic() + PRUNE_INTERVAL
+                self.prune(db)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error writing HTTP cache: {e}")
+        finally:
+            db.close()
+    
+    def _expires_before(self) -> datetime:
+        # updated_at is stored naive UTC
+        return (datetime.now(timezone.utc) - self.ttl).replace(tzinfo=None)
+    
+    def prune(self, db) -> int:
+        """Delete expired entries and the oldest ones beyond max_entries. Returns the number deleted"""
+        deleted = db.query(HttpCacheEntry).filter(HttpCacheEntry.updated_at < self._expires_before()).delete(synchronize_session=False)
+        overflow = db.query(HttpCacheEntry.key).order_by(HttpCacheEntry.updated_at.desc()).offset(self.max_entries)
+        keys = [key for (key,) in overflow]
+        if keys:
+            deleted += db.query(HttpCacheEntry).filter(HttpCacheEntry.key.in_(keys)).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+# Shared by every data source
+http_cache = HTTPResponseCache()
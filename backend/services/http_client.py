@@ -0,0 +1,106 @@
+from collections import deque
+from typing import Any, Dict, Optional, Tuple, Union
+import logging
+import os
+import threading
+import time
+import urllib.parse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# One pooled session serves every source: connections are kept alive per host,
+# and every request gets the same timeouts, User-Agent and size cap
+HTTP_USER_AGENT = os.getenv("HTTP_USER_AGENT", "BrandMonitor/1.0")
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_MAX_RESPONSE_BYTES = int(os.getenv("HTTP_MAX_RESPONSE_BYTES", str(10 * 1024 * 1024)))
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "16"))
+HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", "8"))
+
+# Request durations kept per host for the percentiles in stats()
+TIMING_WINDOW = 200
+
+class ResponseTooLarge(requests.RequestException):
+    """The response body exceeded HTTP_MAX_RESPONSE_BYTES"""
+
+class HTTPClient:
+    """Shared requests.Session with keep-alive pools, gzip/deflate, a body size cap and per-host timing"""
+    
+    def __init__(self, user_agent: str = HTTP_USER_AGENT, timeout: Tuple[float, float] = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+                 max_bytes: int = HTTP_MAX_RESPONSE_BYTES, pool_hosts: int = HTTP_POOL_HOSTS, pool_per_host: int = HTTP_POOL_PER_HOST):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        
+        self.session = requests.Session()
+        # pool_block keeps the number of sockets per host bounded under concurrency
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_per_host, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "User-Agent": user_agent,
+            "Accept-Encoding": "gzip, deflate"
+        })
+        
+        self._timings: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+            timeout: Optional[Union[float, Tuple[float, float]]] = None) -> requests.Response:
+        """GET url with the shared session; the body is read up front and capped at max_bytes.
+        Raises ResponseTooLarge if the body is bigger, and requests exceptions on network errors"""
+        started = time.perf_counter()
+        host = urllib.parse.urlsplit(url).netloc
+        size = 0
+        try:
+            response = self.session.get(url, params=params, headers=headers, timeout=timeout or self.timeout, stream=True)
+            try:
+                declared = response.headers.get("Content-Length")
+                if declared and declared.isdigit() and int(declared) > self.max_bytes:
+                    raise ResponseTooLarge(f"{url} declares {declared} bytes, limit is {self.max_bytes}")
+                
+                chunks = []
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ResponseTooLarge(f"{url} exceeded {self.max_bytes} bytes")
+                    chunks.append(chunk)
+                response._content = b"".join(chunks)
+            finally:
+                # Returns the connection to the pool, or drops it if the body was abandoned
+                response.close()
+            self._record(host, time.perf_counter() - started, size, failed=False)
+            return response
+        except Exception:
+            self._record(host, time.perf_counter() - started, size, failed=True)
+            raise
+    
+    def _record(self, host: str, elapsed: float, size: int, failed: bool):
+        with self._lock:
+            timing = self._timings.setdefault(host, {"requests": 0, "errors": 0, "bytes": 0, "durations": deque(maxlen=TIMING_WINDOW)})
+            timing["requests"] += 1
+            timing["errors"] += int(failed)
+            timing["bytes"] += size
+            timing["durations"].append(elapsed)
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for host, timing in self._timings.items():
+                durations = sorted(timing["durations"])
+                result[host] = {
+                    "requests": timing["requests"],
+                    "errors": timing["errors"],
+                    "bytes": timing["bytes"],
+                    "p50_ms": round(durations[len(durations) // 2] * 1000, 1) if durations else None,
+                    "p99_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.99))] * 1000, 1) if durations else None
+                }
+            return result
+    
+    def close(self):
+        self.session.close()
+
+# Shared by every data source through http_cache
+http_client = HTTPClient()
@@ -0,0 +1,226 @@
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional
+import logging
+import os
+import queue
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from services.data_sources import save_mention_batches
+from services.sentiment_analyzer import SentimentAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# The writer flushes once a batch holds INGEST_BATCH_SIZE mentions or its first
+# submission has waited INGEST_BATCH_WAIT seconds. At most INGEST_QUEUE_SIZE
+# submissions wait in the queue; beyond that fetchers block until it drains
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+INGEST_BATCH_WAIT = float(os.getenv("INGEST_BATCH_WAIT", "0.25"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "256"))
+
+# Longest a fetcher waits for its submission to be written before giving up
+INGEST_WRITE_TIMEOUT = float(os.getenv("INGEST_WRITE_TIMEOUT", "300"))
+
+# Batch latencies kept for the percentiles in stats()
+LATENCY_WINDOW = 500
+
+class IngestQueue:
+    """Bounded hand-off from fetch threads to a single DB writer thread"""
+    
+    def __init__(self, analyzer: Optional[SentimentAnalyzer] = None, batch_size: int = INGEST_BATCH_SIZE,
+                 batch_wait: float = INGEST_BATCH_WAIT, max_pending: int = INGEST_QUEUE_SIZE):
+        self.analyzer = analyzer or SentimentAnalyzer()
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+        self._queue = queue.Queue(maxsize=max(1, max_pending))
+        self._thread = None
+        # A task taken off the queue while a batch was filling, run right after that batch
+        self._held_task = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        
+        self.submitted = 0
+        self.blocked_submits = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.tasks = 0
+        self.mentions_written = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+    
+    def submit(self, mentions: List[Dict[str, Any]], cursor_source: Optional[str] = None) -> Future:
+        """Queue candidate mentions for the writer; the future resolves to how many were new,
+        or raises the error that made the writer roll its batch back.
+        Blocks while the queue is full, which slows fetchers down to the writer's pace"""
+        ticket = Future()
+        if not mentions:
+            ticket.set_result(0)
+            return ticket
+        
+        self.start()
+        item = (mentions, cursor_source, ticket)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.blocked_submits += 1
+            self._queue.put(item)
+        with self._lock:
+            self.submitted += 1
+        return ticket
+    
+    def result(self, ticket: Future, timeout: float = INGEST_WRITE_TIMEOUT) -> int:
+        """Wait for a submitted ticket. A writer that died with the ticket still queued is restarted,
+        and TimeoutError is raised once timeout passes without the batch being written"""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Ingest writer did not finish a submission within {timeout:.0f}s")
+            try:
+                return ticket.result(timeout=min(remaining, 1.0))
+            except FutureTimeout:
+                # No-op while the writer is alive
+                self.start()
+    
+    def write(self, mentions: List[Dict[str, Any]], cursor_source: Optional[str] = None) -> int:
+        """Submit and wait for the batch holding these mentions to commit"""
+        return self.result(self.submit(mentions, cursor_source))
+    
+    def run(self, task: Callable[[Session], Any], timeout: float = INGEST_WRITE_TIMEOUT) -> Any:
+        """Run task(db) on the writer thread between batches and return its result, for writes that
+        do not fit save_mention_batches (such as bulk imports). task commits its own work; an
+        exception rolls it back and is re-raised here"""
+        ticket = Future()
+        self.start()
+        self._queue.put((task, None, ticket))
+        with self._lock:
+            self.submitted += 1
+        return self.result(ticket, timeout)
+    
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+            self._thread.start()
+    
+    def stop(self, timeout: float = 10):
+        """Write out what is already queued, then stop the writer"""
+        with self._lock:
+            thread = self._thread
+            self._stopping = True
+        if thread is not None:
+            thread.join(timeout)
+    
+    def _next_batch(self) -> List[tuple]:
+        """Submissions to write together, or a single task from run()"""
+        if self._held_task is not None:
+            task, self._held_task = self._held_task, None
+            return [task]
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        if callable(first[0]):
+            return [first]
+        
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.batch_wait
+        while size < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if callable(item[0]):
+                self._held_task = item
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                if self._stopping:
+                    return
+                continue
+            
+            try:
+                if callable(batch[0][0]):
+                    self._run_task(batch[0])
+                else:
+                    self._write(batch)
+            except BaseException as e:
+                # Whatever failed, including opening the session, no submission is left waiting.
+                # Every submission in the batch was rolled back together
+                logger.error(f"Ingest writer failed on a batch of {len(batch)} submissions: {e}")
+                with self._lock:
+                    self.failed_batches += 1
+                for _, _, ticket in batch:
+                    if not ticket.done():
+                        ticket.set_exception(e)
+                if not isinstance(e, Exception):
+                    raise
+    
+    def _run_task(self, item: tuple):
+        task, _, ticket = item
+        db = SessionLocal()
+        try:
+            result = task(db)
+        except BaseException:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        with self._lock:
+            self.tasks += 1
+        ticket.set_result(result)
+    
+    def _write(self, batch: List[tuple]):
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            counts = save_mention_batches(db, [(mentions, cursor_source) for mentions, cursor_source, _ in batch], self.analyzer)
+        finally:
+            db.close()
+        elapsed = time.perf_counter() - started
+        
+        with self._lock:
+            self.batches += 1
+            self.mentions_written += sum(counts)
+            self._latencies.append(elapsed)
+        for (_, _, ticket), count in zip(batch, counts):
+            ticket.set_result(count)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "submitted": self.submitted,
+                "blocked_submits": self.blocked_submits,
+                "batches": self.batches,
+                "failed_batches": self.failed_batches,
+                "tasks": self.tasks,
+                "writer_alive": self._thread is not None and self._thread.is_alive(),
+                "mentions_written": self.mentions_written,
+                "batch_latency_ms": {
+                    "last": round(self._latencies[-1] * 1000, 1) if latencies else None,
+                    "p50": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+                    "p99": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 1) if latencies else None
+                }
+            }
+
+# Shared by the API and the scheduler so every fetch goes through one writer
+ingest_queue = IngestQueue()
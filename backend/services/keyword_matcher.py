@@ -0,0 +1,58 @@
+from collections import deque
+from typing import Dict, List, Set
+
+class KeywordMatcher:
+    """Aho-Corasick automaton that finds every keyword occurring in a text in one pass.
+    Matching is case-insensitive substring matching, like `keyword.lower() in text.lower()`"""
+    
+    def __init__(self, keywords: List[str]):
+        self.keywords = list(keywords)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Set[int]] = [set()]
+        
+        for index, keyword in enumerate(self.keywords):
+            self._add(keyword.lower(), index)
+        self._build_failure_links()
+    
+    def _add(self, keyword: str, index: int):
+        if not keyword:
+            return
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].add(index)
+    
+    def _build_failure_links(self):
+        # Breadth-first, so every state's failure target is resolved before its children
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # Inherit matches that end at the failure target
+                self._output[next_state] |= self._output[self._fail[next_state]]
+    
+    def find(self, text: str) -> Set[int]:
+        """Indexes of every keyword found in text"""
+        found = set()
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
@@ -0,0 +1,227 @@
+"""
+Near-duplicate detection for syndicated and cross-posted mentions: each text
+gets a MinHash signature over word shingles, and recent signatures are kept
+in a banded LSH index. A lookup only compares against the entries that share
+a band with it, so its cost does not grow with the size of the window.
+"""
+from array import array
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from models import Mention
+
+logger = logging.getLogger(__name__)
+
+# Texts whose shingle sets have an estimated Jaccard similarity of at least
+# NEAR_DUP_THRESHOLD are duplicates (0 disables detection). Mentions stored in
+# the last NEAR_DUP_WINDOW_HOURS are indexed, up to NEAR_DUP_MAX_ENTRIES of them
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+NEAR_DUP_WINDOW_HOURS = float(os.getenv("NEAR_DUP_WINDOW_HOURS", "48"))
+NEAR_DUP_MAX_ENTRIES = int(os.getenv("NEAR_DUP_MAX_ENTRIES", "50000"))
+
+# Short texts share too many shingles by chance to be compared
+NEAR_DUP_MIN_WORDS = int(os.getenv("NEAR_DUP_MIN_WORDS", "8"))
+
+# Signature length; an indexed mention takes about 1 KB at the default of 64
+NEAR_DUP_PERMUTATIONS = int(os.getenv("NEAR_DUP_PERMUTATIONS", "64"))
+
+SHINGLE_WORDS = 3
+
+TOKEN_RE = re.compile(r"\w+")
+URL_RE = re.compile(r"https?://\S+")
+
+def _shingles(text: str, min_words: int) -> Optional[set]:
+    """The overlapping SHINGLE_WORDS-word shingles of text, None for short texts"""
+    tokens = TOKEN_RE.findall(URL_RE.sub(" ", (text or "").lower()))
+    if len(tokens) < min_words:
+        return None
+    return {" ".join(tokens[i:i + SHINGLE_WORDS]) for i in range(len(tokens) - SHINGLE_WORDS + 1)}
+
+def choose_bands(permutations: int, threshold: float) -> Tuple[int, int]:
+    """(bands, rows) with bands * rows == permutations, using the most rows whose LSH
+    S-curve midpoint (1/bands)^(1/rows) still lies at or below threshold"""
+    for rows in range(permutations, 0, -1):
+        if permutations % rows == 0 and (1 / (permutations // rows)) ** (1 / rows) <= threshold:
+            return permutations // rows, rows
+    return permutations, 1
+
+class NearDuplicateIndex:
+    """MinHash LSH over recently stored mentions, expiring by insertion time"""
+    
+    def __init__(self, threshold: float = NEAR_DUP_THRESHOLD, window_hours: float = NEAR_DUP_WINDOW_HOURS,
+                 max_entries: int = NEAR_DUP_MAX_ENTRIES, min_words: int = NEAR_DUP_MIN_WORDS,
+                 permutations: int = NEAR_DUP_PERMUTATIONS):
+        self.threshold = threshold
+        self.window_seconds = window_hours * 3600
+        self.max_entries = max_entries
+        self.min_words = min_words
+        
+        self.permutations = max(1, permutations)
+        bands, rows = choose_bands(self.permutations, threshold) if self.enabled else (1, self.permutations)
+        self._bands = [(band * rows, (band + 1) * rows) for band in range(bands)]
+        
+        # Entry id -> (signature, url); entries are expired oldest first from _order.
+        # A band bucket holds one entry id, or a list of them once it is shared
+        self._entries: Dict[int, Tuple[array, str]] = {}
+        self._order = deque()
+        self._buckets: List[Dict[int, Any]] = [{} for _ in self._bands]
+        self._next_id = 0
+        self._lock = threading.Lock()
+        # Mentions inserted before this are not seen by add(), only by warm()
+        self.started_at = datetime.now(timezone.utc)
+        
+        self.checked = 0
+        self.collapsed = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return 0 < self.threshold <= 1
+    
+    def signature(self, text: str) -> Optional[array]:
+        """MinHash signature of text's shingles, or None when it is too short to compare"""
+        shingles = _shingles(text, self.min_words)
+        if not shingles:
+            return None
+        # One SHAKE digest per shingle supplies a 32-bit hash for every permutation,
+        # and the per-permutation minimum is taken column-wise
+        size = 4 * self.permutations
+        hashes = (memoryview(hashlib.shake_128(shingle.encode("utf-8")).digest(size)).cast("I") for shingle in shingles)
+        return array("I", map(min, zip(*hashes)))
+    
+    def similarity(self, first: array, second: array) -> float:
+        """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+        return sum(x == y for x, y in zip(first, second)) / len(first)
+    
+    def _keys(self, signature: array) -> List[int]:
+        return [hash(signature[start:end].tobytes()) for start, end in self._bands]
+    
+    def _find(self, signature: array, buckets: List[Dict[int, Any]], entries: Dict[int, Tuple[array, str]]) -> Optional[str]:
+        checked = set()
+        for band, key in enumerate(self._keys(signature)):
+            found = buckets[band].get(key)
+            if found is None:
+                continue
+            for entry_id in found if isinstance(found, list) else (found,):
+                if entry_id in checked:
+                    continue
+                checked.add(entry_id)
+                other, url = entries[entry_id]
+                if self.similarity(signature, other) >= self.threshold:
+                    return url
+        return None
+    
+    def _insert(self, signature: array, url: str, buckets: List[Dict[int, Any]], entries: Dict[int, Tuple[array, str]]) -> int:
+        entry_id = self._next_id
+        self._next_id += 1
+        entries[entry_id] = (signature, url)
+        for band, key in enumerate(self._keys(signature)):
+            found = buckets[band].get(key)
+            if found is None:
+                buckets[band][key] = entry_id
+            elif isinstance(found, list):
+                found.append(entry_id)
+            else:
+                buckets[band][key] = [found, entry_id]
+        return entry_id
+    
+    def _remove(self, entry_id: int):
+        signature, _ = self._entries.pop(entry_id)
+        for band, key in enumerate(self._keys(signature)):
+            found = self._buckets[band].get(key)
+            if isinstance(found, list):
+                found.remove(entry_id)
+                if len(found) == 1:
+                    self._buckets[band][key] = found[0]
+            elif found == entry_id:
+                del self._buckets[band][key]
+    
+    def _expire(self, now: float):
+        while self._order and (self._order[0][1] < now - self.window_seconds or len(self._order) > self.max_entries):
+            self._remove(self._order.popleft()[0])
+    
+    def split(self, mentions: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], str]]]:
+        """Separate candidate mentions into (kept, collapsed) before they are scored.
+        A mention is collapsed when it is at least threshold similar to an indexed mention or to an
+        earlier kept one in the same list; collapsed entries carry the URL they duplicate.
+        Kept mentions get a "signature" key to pass to add() once they are stored"""
+        if not self.enabled or not mentions:
+            return mentions, []
+        
+        kept, collapsed = [], []
+        # Kept mentions of this batch are matched in a scratch index, since they are not stored yet
+        batch_buckets: List[Dict[int, Any]] = [{} for _ in self._bands]
+        batch_entries: Dict[int, Tuple[array, str]] = {}
+        signatures = [self.signature(mention["text"]) for mention in mentions]
+        with self._lock:
+            self._expire(time.time())
+            for mention, signature in zip(mentions, signatures):
+                if signature is not None:
+                    original = self._find(signature, self._buckets, self._entries) or self._find(signature, batch_buckets, batch_entries)
+                    if original is not None:
+                        collapsed.append((mention, original))
+                        continue
+                    self._insert(signature, mention["url"], batch_buckets, batch_entries)
+                mention["signature"] = signature
+                kept.append(mention)
+            self.checked += len(mentions)
+            self.collapsed += len(collapsed)
+        return kept, collapsed
+    
+    def add(self, mentions: List[Dict[str, Any]]):
+        """Index stored mentions, oldest first: dicts with url and text, plus signature when
+        split() computed it and inserted_at to expire them by (now if missing)"""
+        if not self.enabled:
+            return
+        now = time.time()
+        signatures = [mention["signature"] if "signature" in mention else self.signature(mention["text"]) for mention in mentions]
+        with self._lock:
+            for mention, signature in zip(mentions, signatures):
+                if signature is None:
+                    continue
+                inserted_at = mention.get("inserted_at")
+                if inserted_at is not None and inserted_at.tzinfo is None:
+                    inserted_at = inserted_at.replace(tzinfo=timezone.utc)
+                entry_id = self._insert(signature, mention["url"], self._buckets, self._entries)
+                self._order.append((entry_id, inserted_at.timestamp() if inserted_at else now))
+            self._expire(now)
+    
+    def warm(self, db: Session, batch_size: int = 5000) -> int:
+        """Index mentions stored in the window before this process started. Returns the mentions read"""
+        if not self.enabled:
+            return 0
+        since = self.started_at - timedelta(seconds=self.window_seconds)
+        query = db.query(Mention.url, Mention.text, Mention.inserted_at).filter(
+            Mention.inserted_at >= since.replace(tzinfo=None),
+            Mention.inserted_at < self.started_at.replace(tzinfo=None)
+        ).order_by(Mention.inserted_at).execution_options(yield_per=batch_size)
+        
+        count = 0
+        batch = []
+        for url, text, inserted_at in query:
+            batch.append({"url": url, "text": text, "inserted_at": inserted_at})
+            if len(batch) >= batch_size:
+                self.add(batch)
+                count += len(batch)
+                batch = []
+        self.add(batch)
+        return count + len(batch)
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "indexed": len(self._entries),
+                "checked": self.checked,
+                "collapsed": self.collapsed
+            }
+
+# Shared by every ingest path
+near_duplicates = NearDuplicateIndex()
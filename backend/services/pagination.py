@@ -0,0 +1,100 @@
+from datetime import datetime
+from typing import Any, Hashable, List, Optional, Tuple
+import base64
+import json
+import os
+import threading
+import time
+
+from sqlalchemy import and_, desc, or_
+from sqlalchemy.orm import Query
+
+# Seconds a cached pagination total stays valid
+PAGINATION_COUNT_TTL = float(os.getenv("PAGINATION_COUNT_TTL", "30"))
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+def encode_cursor(sort_name: str, descending: bool, sort_value: Any, row_id: int) -> str:
+    """Opaque token for the position right after (sort_value, row_id) in the named sort order"""
+    payload = json.dumps([sort_name, "desc" if descending else "asc", _encode_value(sort_value), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, bool, Any, int]:
+    """(sort_name, descending, sort_value, row_id). Raises ValueError for tokens that were not produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_name, order, sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if order not in ("asc", "desc"):
+            raise ValueError(order)
+        return str(sort_name), order == "desc", _decode_value(sort_value), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def keyset_page(query: Query, sort_expr, id_column, descending: bool, cursor: Optional[str], limit: int,
+                sort_name: str = "") -> Tuple[List[Any], Optional[str]]:
+    """One page ordered by (sort_expr, id), starting after cursor.
+    sort_name identifies sort_expr inside the cursor; a cursor from another sort column or order raises ValueError.
+    Returns the rows and the cursor for the next page, or None on the last page"""
+    if cursor:
+        cursor_sort, cursor_descending, sort_value, row_id = decode_cursor(cursor)
+        if cursor_sort != sort_name or cursor_descending != descending:
+            raise ValueError(f"Cursor was issued for sort {cursor_sort} {'desc' if cursor_descending else 'asc'}, "
+                             f"not {sort_name} {'desc' if descending else 'asc'}")
+        if descending:
+            query = query.filter(or_(sort_expr < sort_value, and_(sort_expr == sort_value, id_column < row_id)))
+        else:
+            query = query.filter(or_(sort_expr > sort_value, and_(sort_expr == sort_value, id_column > row_id)))
+    
+    if descending:
+        query = query.order_by(desc(sort_expr), desc(id_column))
+    else:
+        query = query.order_by(sort_expr, id_column)
+    
+    # Fetch one extra row to learn whether another page exists
+    rows = query.add_columns(sort_expr.label("_sort_key")).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_name, descending, last._sort_key, last[0].id)
+    return [row[0] for row in rows], next_cursor
+
+class CountCache:
+    """Short-lived pagination totals keyed by the filters that produced them"""
+    
+    def __init__(self, ttl: float = PAGINATION_COUNT_TTL, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def count(self, key: Hashable, query: Query) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                return entry[0]
+        
+        total = query.order_by(None).count()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (total, now + self.ttl)
+        return total
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Shared by the mention list endpoints
+count_cache = CountCache()
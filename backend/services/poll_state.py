@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+import os
+from sqlalchemy.orm import Session
+from models import KeywordPollState
+
+# Per-keyword, per-source polling adapts between these bounds so each poll is
+# expected to find about POLL_TARGET_YIELD new mentions
+POLL_MIN_MINUTES = float(os.getenv("POLL_MIN_MINUTES", "10"))
+POLL_MAX_MINUTES = float(os.getenv("POLL_MAX_MINUTES", "360"))
+POLL_TARGET_YIELD = float(os.getenv("POLL_TARGET_YIELD", "5"))
+
+# Weight of the latest poll in the smoothed mention rate
+POLL_RATE_SMOOTHING = float(os.getenv("POLL_RATE_SMOOTHING", "0.3"))
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def next_interval(interval_seconds: float, mention_rate: float,
+                  min_seconds: float = POLL_MIN_MINUTES * 60, max_seconds: float = POLL_MAX_MINUTES * 60) -> float:
+    """Seconds until the next poll for a source producing mention_rate new mentions per hour.
+    Idle sources back off by doubling instead of jumping straight to the maximum"""
+    if mention_rate > 0:
+        interval = POLL_TARGET_YIELD / mention_rate * 3600
+    else:
+        interval = interval_seconds * 2
+    return min(max_seconds, max(min_seconds, interval))
+
+def load_poll_state(db: Session, source: str, keyword_search_ids: Iterable[int]) -> Dict[int, KeywordPollState]:
+    """Stored polling state for source, keyed by keyword_search id"""
+    ids = [keyword_search_id for keyword_search_id in keyword_search_ids if keyword_search_id is not None]
+    if not ids:
+        return {}
+    
+    rows = db.query(KeywordPollState).filter(
+        KeywordPollState.source == source,
+        KeywordPollState.keyword_search_id.in_(ids)
+    )
+    return {row.keyword_search_id: row for row in rows}
+
+def due_at(state: Optional[KeywordPollState]) -> Optional[datetime]:
+    """When the stored state says the next poll is due, as an aware UTC datetime"""
+    return _utc(state.next_poll_at) if state is not None else None
+
+def record_poll(db: Session, keyword_search_id: int, source: str, new_mentions: int, default_interval: float) -> Tuple[float, datetime]:
+    """Fold one poll's yield into the smoothed rate and store the next interval; the caller commits.
+    Returns (interval_seconds, next_poll_at)"""
+    now = datetime.now(timezone.utc)
+    state = db.get(KeywordPollState, (keyword_search_id, source))
+    if state is None:
+        state = KeywordPollState(keyword_search_id=keyword_search_id, source=source,
+                                 interval_seconds=default_interval, mention_rate=0.0)
+        db.add(state)
+    
+    # Rate over the time this poll actually covered, falling back to the planned interval
+    last_polled_at = _utc(state.last_polled_at)
+    covered = (now - last_polled_at).total_seconds() if last_polled_at else state.interval_seconds
+    observed_rate = new_mentions / max(covered, 60) * 3600
+    if state.last_polled_at is None:
+        state.mention_rate = observed_rate
+    else:
+        state.mention_rate = POLL_RATE_SMOOTHING * observed_rate + (1 - POLL_RATE_SMOOTHING) * state.mention_rate
+    
+    state.interval_seconds = next_interval(state.interval_seconds, state.mention_rate)
+    state.last_polled_at = now
+    state.next_poll_at = now + timedelta(seconds=state.interval_seconds)
+    state.updated_at = now
+    return state.interval_seconds, state.next_poll_at
@@ -0,0 +1,215 @@
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+import logging
+import os
+import random
+import threading
+import time
+import urllib.parse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Defaults for every upstream host; each can be overridden per source with a
+# _<SOURCE> suffix, e.g. UPSTREAM_RATE_REDDIT=0.5
+UPSTREAM_DEFAULTS = {
+    "UPSTREAM_RATE": 2.0,               # requests per second per host
+    "UPSTREAM_BURST": 5,                # requests allowed back to back
+    "UPSTREAM_RETRIES": 2,              # retries after the first attempt
+    "UPSTREAM_BACKOFF_BASE": 0.5,       # seconds, doubled per retry
+    "UPSTREAM_BACKOFF_MAX": 10.0,       # cap on one backoff or Retry-After wait
+    "UPSTREAM_BREAKER_THRESHOLD": 5,    # consecutive failures that open the circuit
+    "UPSTREAM_BREAKER_COOLDOWN": 120.0  # seconds a host is skipped once open
+}
+
+# Reddit throttles unauthenticated clients hard; Algolia is generous
+SOURCE_DEFAULTS = {
+    "reddit": {"UPSTREAM_RATE": 0.5, "UPSTREAM_BURST": 2},
+    "hackernews": {"UPSTREAM_RATE": 5.0, "UPSTREAM_BURST": 10},
+}
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+def source_setting(source: str, name: str) -> float:
+    default = SOURCE_DEFAULTS.get(source, {}).get(name, UPSTREAM_DEFAULTS[name])
+    value = os.getenv(f"{name}_{source.upper()}", os.getenv(name))
+    return type(default)(value) if value is not None else default
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+class TokenBucket:
+    """Allows rate requests per second on average with bursts of up to capacity"""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = max(rate, 0.001)
+        self.capacity = max(capacity, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns the seconds waited"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now, so concurrent callers queue up behind each other
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+class CircuitBreaker:
+    """Opens after threshold consecutive failures; after cooldown one trial call is let through"""
+    
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+    
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Delay requested by a Retry-After header, given either in seconds or as an HTTP date"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+class UpstreamGuard:
+    """Rate limiting and circuit breaking per upstream host plus retries, shared by every data source.
+    Limits come from the settings of the source that first calls a host"""
+    
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._breakers: Dict[str, Tuple[str, CircuitBreaker]] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+    
+    def _bucket(self, source: str, url: str) -> TokenBucket:
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(source_setting(source, "UPSTREAM_RATE"), source_setting(source, "UPSTREAM_BURST"))
+            return self._buckets[host]
+    
+    def _breaker(self, source: str, url: str) -> CircuitBreaker:
+        # Per host, so one dead RSS feed does not take the other feeds down with it
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = (source, CircuitBreaker(
+                    source_setting(source, "UPSTREAM_BREAKER_THRESHOLD"),
+                    source_setting(source, "UPSTREAM_BREAKER_COOLDOWN")
+                ))
+            return self._breakers[host][1]
+    
+    def _count(self, source: str, name: str, amount: float = 1):
+        with self._lock:
+            counters = self._stats.setdefault(source, {"calls": 0, "retries": 0, "failures": 0, "short_circuited": 0, "throttled_seconds": 0.0})
+            counters[name] += amount
+    
+    def call(self, source: str, url: str, send: Callable[[], requests.Response]) -> requests.Response:
+        """Run send() for url under source's limits, retrying timeouts, connection errors, 429 and 5xx.
+        Returns the last response (callers still check its status) or raises the last exception"""
+        breaker = self._breaker(source, url)
+        if not breaker.allow():
+            self._count(source, "short_circuited")
+            raise CircuitOpenError(f"{source} circuit is open, skipping {url}")
+        
+        bucket = self._bucket(source, url)
+        retries = source_setting(source, "UPSTREAM_RETRIES")
+        backoff_base = source_setting(source, "UPSTREAM_BACKOFF_BASE")
+        backoff_max = source_setting(source, "UPSTREAM_BACKOFF_MAX")
+        
+        attempt = 0
+        while True:
+            self._count(source, "throttled_seconds", bucket.acquire())
+            self._count(source, "calls")
+            response = None
+            try:
+                response = send()
+                failed = response.status_code in RETRYABLE_STATUS
+                error = None
+            except (requests.ConnectionError, requests.Timeout) as e:
+                failed = True
+                error = e
+            except Exception:
+                breaker.record_failure()
+                raise
+            
+            if not failed:
+                breaker.record_success()
+                return response
+            
+            if attempt >= retries:
+                self._count(source, "failures")
+                breaker.record_failure()
+                if error is not None:
+                    raise error
+                return response
+            
+            # Full jitter, unless the upstream said how long to wait
+            delay = random.uniform(0, min(backoff_max, backoff_base * (2 ** attempt)))
+            requested = retry_after_seconds(response) if response is not None else None
+            if requested is not None:
+                delay = min(backoff_max, requested)
+            attempt += 1
+            self._count(source, "retries")
+            logger.info(f"Retrying {source} request in {delay:.1f}s (attempt {attempt + 1}): {error or response.status_code}")
+            time.sleep(delay)
+    
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            counters = {source: dict(values) for source, values in self._stats.items()}
+            breakers = dict(self._breakers)
+        for host, (source, breaker) in breakers.items():
+            counters.setdefault(source, {}).setdefault("circuits", {})[host] = breaker.state
+        for values in counters.values():
+            if "throttled_seconds" in values:
+                values["throttled_seconds"] = round(values["throttled_seconds"], 2)
+        return counters
+
+# Shared by every data source through http_cache
+upstream_guard = UpstreamGuard()
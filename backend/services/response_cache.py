@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+import logging
+import os
+import threading
+import time
+
+from services.pagination import count_cache
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached dashboard response stays valid (0 disables caching) and
+# how many distinct parameter sets are kept
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+
+class _Flight:
+    """A computation in progress that identical misses wait on"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class ResponseCache:
+    """TTL + LRU cache for read-heavy endpoints, invalidated by a generation counter"""
+    
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+    
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing it once if missing or stale"""
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return compute()
+        
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] == self.generation and entry[2] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+                leader = True
+            generation = self.generation
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        
+        try:
+            flight.result = compute()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                # A result computed across an invalidation is handed to waiters but not kept
+                if flight.error is None and generation == self.generation:
+                    self._entries[key] = (flight.result, generation, time.monotonic() + self.ttl)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+        return flight.result
+    
+    def invalidate(self):
+        """Drop every cached response; called whenever mentions or alerts change"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+    
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "generation": self.generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0
+            }
+
+# Shared by the dashboard endpoints
+response_cache = ResponseCache()
+
+def notify_data_changed():
+    """Invalidate cached responses and pagination totals after a write"""
+    response_cache.invalidate()
+    count_cache.clear()
@@ -0,0 +1,124 @@
+"""
+Hourly mention rollups: counts and sentiment-score sums keyed by
+(hour, platform, sentiment, keyword_search_id), maintained during ingest.
+
+Rebuild from the mentions table with:
+    python -m services.rollups rebuild
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, Tuple
+import logging
+import sys
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, dialect_insert
+from models import Mention, MentionHourlyRollup
+
+logger = logging.getLogger(__name__)
+
+def hour_of(value: datetime) -> datetime:
+    """Naive hour bucket, matching how created_at is stored"""
+    return value.replace(tzinfo=None, minute=0, second=0, microsecond=0)
+
+def _aggregate(mentions: Iterable[Dict[str, Any]]) -> Dict[Tuple, list]:
+    groups = {}
+    for mention in mentions:
+        key = (
+            hour_of(mention["created_at"]),
+            mention["platform"],
+            mention["sentiment"],
+            mention.get("keyword_search_id") or 0
+        )
+        group = groups.setdefault(key, [0, 0.0])
+        group[0] += 1
+        group[1] += mention.get("sentiment_score") or 0.0
+    return groups
+
+def record_mentions(db: Session, mentions: Iterable[Dict[str, Any]]):
+    """Add freshly inserted mentions to their hourly rollups; the caller commits"""
+    groups = _aggregate(mentions)
+    if not groups:
+        return
+    
+    rows = [
+        {
+            "hour": hour,
+            "platform": platform,
+            "sentiment": sentiment,
+            "keyword_search_id": keyword_search_id,
+            "mention_count": count,
+            "sentiment_score_sum": score_sum
+        }
+        for (hour, platform, sentiment, keyword_search_id), (count, score_sum) in groups.items()
+    ]
+    
+    table = MentionHourlyRollup.__table__
+    stmt = dialect_insert(db, table)
+    if hasattr(stmt, "on_conflict_do_update"):
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["hour", "platform", "sentiment", "keyword_search_id"],
+            set_={
+                "mention_count": table.c.mention_count + stmt.excluded.mention_count,
+                "sentiment_score_sum": table.c.sentiment_score_sum + stmt.excluded.sentiment_score_sum
+            }
+        )
+        db.execute(stmt, rows)
+        return
+    
+    # Dialects without upsert fall back to read-modify-write
+    for row in rows:
+        rollup = db.get(MentionHourlyRollup, (row["hour"], row["platform"], row["sentiment"], row["keyword_search_id"]))
+        if rollup:
+            rollup.mention_count += row["mention_count"]
+            rollup.sentiment_score_sum += row["sentiment_score_sum"]
+        else:
+            db.add(MentionHourlyRollup(**row))
+
+def rebuild_rollups(db: Session, batch_size: int = 5000) -> int:
+    """Recompute every rollup from the mentions table. Returns the number of rollup rows"""
+    query = db.query(
+        Mention.created_at,
+        Mention.platform,
+        Mention.sentiment,
+        Mention.sentiment_score,
+        Mention.keyword_search_id
+    ).yield_per(batch_size)
+    
+    groups = _aggregate(row._asdict() for row in query)
+    
+    db.query(MentionHourlyRollup).delete(synchronize_session=False)
+    rows = [
+        {
+            "hour": hour,
+            "platform": platform,
+            "sentiment": sentiment,
+            "keyword_search_id": keyword_search_id,
+            "mention_count": count,
+            "sentiment_score_sum": score_sum
+        }
+        for (hour, platform, sentiment, keyword_search_id), (count, score_sum) in groups.items()
+    ]
+    if rows:
+        db.execute(MentionHourlyRollup.__table__.insert(), rows)
+    db.commit()
+    return len(rows)
+
+def ensure_rollups(db: Session):
+    """Backfill rollups once for databases that predate them"""
+    if db.query(MentionHourlyRollup).first() is None and db.query(Mention).first() is not None:
+        count = rebuild_rollups(db)
+        logger.info(f"Backfilled {count} hourly rollups")
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        print(__doc__)
+        sys.exit(1)
+    
+    from database import create_tables
+    create_tables()
+    db = SessionLocal()
+    try:
+        print(f"Rebuilt {rebuild_rollups(db)} hourly rollups")
+    finally:
+        db.close()
@@ -1,51 +1,45 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from datetime import datetime
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
+from datetime import datetime, timezone
 from database import SessionLocal
 from models import KeywordSearch, Alert
 from services.data_sources import DataSourceManager
+from services.ingest_queue import ingest_queue
 from services.spike_detector import SpikeDetector
+from services.response_cache import notify_data_changed
+from services.poll_state import load_poll_state, due_at, record_poll
+from services.topics import topic_tracker, TOPIC_FLUSH_MINUTES
+from services.near_duplicates import near_duplicates
+from services.url_filter import url_filter
 from sqlalchemy import and_
 from datetime import timedelta
+from typing import List, Optional
 import logging
+import os
+import random
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Base fetch interval: feeds are downloaded once per interval and keywords
+# without polling history start here. Keyword polls then adapt within the
+# bounds in services/poll_state.py; every run is shifted by up to FETCH_JITTER_SECONDS
+FETCH_INTERVAL_MINUTES = float(os.getenv("FETCH_INTERVAL_MINUTES", "60"))
+FETCH_JITTER_SECONDS = int(os.getenv("FETCH_JITTER_SECONDS", "120"))
+
 class BackgroundTaskRunner:
-    def __init__(self):
+    def __init__(self, interval_minutes: float = FETCH_INTERVAL_MINUTES, jitter_seconds: int = FETCH_JITTER_SECONDS,
+                 data_manager: Optional[DataSourceManager] = None):
         self.scheduler = BackgroundScheduler()
-        self.data_manager = DataSourceManager()
-    
-    def fetch_all_keywords_mentions(self):
-        """Background task to fetch mentions for all keywords with sentiment analysis and spike detection"""
-        try:
-            db = SessionLocal()
-            
-            # Get all active keyword searches
-            keyword_searches = db.query(KeywordSearch).filter(KeywordSearch.is_active == True).all()
-            
-            if not keyword_searches:
-                logger.info("No active keywords found")
-                return
-            
-            logger.info(f"Starting fetch for {len(keyword_searches)} keywords")
-            
-            total_mentions = 0
-            for keyword_search in keyword_searches:
-                mentions_count = self.data_manager.fetch_all_mentions(db, keyword_search)
-                total_mentions += mentions_count
-                logger.info(f"Fetched {mentions_count} mentions for '{keyword_search.keyword}'")
-            
-            # Run spike detection after fetching all mentions
-            if total_mentions > 0:
-                self._check_for_spikes(db)
-            
-            logger.info(f"Background task completed. Total mentions: {total_mentions}")
-            
-        except Exception as e:
-            logger.error(f"Error in background task: {e}")
-        finally:
-            db.close()
+        self.data_manager = data_manager or DataSourceManager(ingest=ingest_queue)
+        self.interval = timedelta(minutes=interval_minutes)
+        self.jitter_seconds = jitter_seconds
+        # Ids of poll jobs that are running; a date job leaves the jobstore when it starts
+        self._running_polls = set()
+        self._running_lock = threading.Lock()
+        self.scheduler.add_listener(self._track_running_polls, EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
     
     def _check_for_spikes(self, db):
         """Check for spikes and create alerts"""
@@ -70,33 +64,250 @@ class BackgroundTaskRunner:
             
             if created_alerts > 0:
                 db.commit()
+                notify_data_changed()
                 logger.info(f"Created {created_alerts} new alerts")
             
         except Exception as e:
             logger.error(f"Error in spike detection: {e}")
     
+    def fetch_keyword_mentions(self, keyword_id: int, source: str):
+        """Scheduled job: fetch one per-keyword source for one keyword, then schedule the next poll from its yield"""
+        db = SessionLocal()
+        try:
+            keyword_search = db.query(KeywordSearch).filter(KeywordSearch.id == keyword_id).first()
+            if not keyword_search or not keyword_search.is_active:
+                self.remove_keyword_job(keyword_id)
+                return
+            
+            mentions_count = 0
+            try:
+                counts = self.data_manager.fetch_keywords_mentions([keyword_search], sources=[source])
+                mentions_count = counts.get(keyword_id, 0)
+                logger.info(f"Fetched {mentions_count} mentions for '{keyword_search.keyword}' from {source}")
+                
+                if mentions_count > 0:
+                    self._check_for_spikes(db)
+            finally:
+                # Always reschedule, so a failing poll backs off like an idle one
+                interval_seconds, next_poll_at = record_poll(db, keyword_id, source, mentions_count, self.interval.total_seconds())
+                db.commit()
+                self._schedule_poll(keyword_id, source, next_poll_at)
+                logger.info(f"Next {source} poll for '{keyword_search.keyword}' in {interval_seconds / 60:.0f} min")
+        except Exception as e:
+            logger.error(f"Error fetching keyword {keyword_id} from {source}: {e}")
+        finally:
+            db.close()
+    
+    def fetch_feed_mentions(self):
+        """Scheduled job: download the shared feeds once and match them against every active keyword"""
+        db = SessionLocal()
+        try:
+            keyword_searches = db.query(KeywordSearch).filter(KeywordSearch.is_active == True).all()
+            self._sync_keyword_jobs([keyword_search.id for keyword_search in keyword_searches])
+            if not keyword_searches:
+                return
+            
+            counts = self.data_manager.fetch_keywords_mentions(keyword_searches, sources=list(self.data_manager.feed_sources))
+            total_mentions = sum(counts.values())
+            logger.info(f"Feed cycle for {len(keyword_searches)} keywords saved {total_mentions} mentions")
+            
+            if total_mentions > 0:
+                self._check_for_spikes(db)
+        except Exception as e:
+            logger.error(f"Error in feed cycle: {e}")
+        finally:
+            db.close()
+    
+    def flush_topics(self):
+        """Scheduled job: write the current trending topics into the topics table"""
+        db = SessionLocal()
+        try:
+            written = topic_tracker.flush(db)
+            notify_data_changed()
+            logger.info(f"Flushed {written} trending topics")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error flushing topics: {e}")
+        finally:
+            db.close()
+    
+    def warm_topics(self):
+        """One-off job at startup: rebuild the topic window from stored mentions, then flush it"""
+        db = SessionLocal()
+        try:
+            count = topic_tracker.warm(db)
+            logger.info(f"Topic window rebuilt from {count} stored mentions")
+        except Exception as e:
+            logger.error(f"Error rebuilding topic window: {e}")
+        finally:
+            db.close()
+        self.flush_topics()
+    
+    def warm_near_duplicates(self):
+        """One-off job at startup: index recently stored mentions for near-duplicate detection"""
+        db = SessionLocal()
+        try:
+            count = near_duplicates.warm(db)
+            logger.info(f"Near-duplicate index rebuilt from {count} stored mentions")
+        except Exception as e:
+            logger.error(f"Error rebuilding near-duplicate index: {e}")
+        finally:
+            db.close()
+    
+    def warm_url_filter(self):
+        """One-off job at startup: load the URL filter and add stored mentions it has not seen"""
+        db = SessionLocal()
+        try:
+            count = url_filter.warm(db)
+            logger.info(f"URL filter ready after reading {count} stored mentions")
+        except Exception as e:
+            logger.error(f"Error warming URL filter: {e}")
+        finally:
+            db.close()
+    
+    def _schedule_poll(self, keyword_id: int, source: str, run_at: datetime):
+        jitter = random.uniform(-self.jitter_seconds, self.jitter_seconds)
+        self.scheduler.add_job(
+            func=self.fetch_keyword_mentions,
+            trigger="date",
+            run_date=max(run_at + timedelta(seconds=jitter), datetime.now(timezone.utc)),
+            args=[keyword_id, source],
+            id=f"fetch_keyword_{keyword_id}_{source}",
+            name=f"Fetch {source} mentions for keyword {keyword_id}",
+            replace_existing=True
+        )
+    
+    def add_keyword_job(self, keyword_id: int, offset: Optional[timedelta] = None):
+        """Poll each per-keyword source for a keyword, starting after offset (a random point in the base interval by default).
+        Later polls are spaced by the adaptive interval stored in keyword_poll_state"""
+        for source in self.data_manager.keyword_sources:
+            start_offset = offset if offset is not None else self.interval * random.random()
+            self._schedule_poll(keyword_id, source, datetime.now(timezone.utc) + start_offset)
+    
+    def remove_keyword_job(self, keyword_id: int):
+        for source in self.data_manager.keyword_sources:
+            try:
+                self.scheduler.remove_job(f"fetch_keyword_{keyword_id}_{source}")
+            except JobLookupError:
+                pass
+    
+    def _track_running_polls(self, event):
+        if not event.job_id.startswith("fetch_keyword_"):
+            return
+        with self._running_lock:
+            if event.code == EVENT_JOB_SUBMITTED:
+                self._running_polls.add(event.job_id)
+            else:
+                self._running_polls.discard(event.job_id)
+    
+    def _sync_keyword_jobs(self, keyword_ids: List[int]):
+        """Schedule polls for (keyword, source) pairs that lack one and drop polls for keywords that are gone.
+        A running poll counts as scheduled, since it schedules its successor; missing polls resume
+        at their stored next poll, or at a random point in the base interval without one"""
+        active = set(keyword_ids)
+        scheduled = set()
+        for job in self.scheduler.get_jobs():
+            if job.id.startswith("fetch_keyword_"):
+                scheduled.add(job.id)
+                if job.args[0] not in active:
+                    self.remove_keyword_job(job.args[0])
+        with self._running_lock:
+            scheduled |= self._running_polls
+        
+        missing = [
+            (keyword_id, source)
+            for keyword_id in keyword_ids
+            for source in self.data_manager.keyword_sources
+            if f"fetch_keyword_{keyword_id}_{source}" not in scheduled
+        ]
+        if not missing:
+            return
+        
+        db = SessionLocal()
+        try:
+            states = {
+                source: load_poll_state(db, source, [keyword_id for keyword_id, missing_source in missing if missing_source == source])
+                for source in {source for _, source in missing}
+            }
+        finally:
+            db.close()
+        now = datetime.now(timezone.utc)
+        for keyword_id, source in missing:
+            next_poll_at = due_at(states[source].get(keyword_id))
+            if next_poll_at is None or next_poll_at <= now:
+                next_poll_at = now + self.interval * random.random()
+            self._schedule_poll(keyword_id, source, next_poll_at)
+    
     def start(self):
-        """Start the scheduler"""
-        # Run immediately on startup
-        logger.info("Running initial fetch on startup...")
-        self.fetch_all_keywords_mentions()
+        """Start the scheduler without waiting for any fetch"""
+        self.scheduler.start()
         
-        # Add job to run every hour
+        # Keywords resume at their stored next poll. Overdue and never-polled ones start
+        # one slot apart, so their polls land evenly across the base interval instead of
+        # all at once; every poll runs in the background
+        db = SessionLocal()
+        try:
+            keyword_ids = [keyword_id for (keyword_id,) in db.query(KeywordSearch.id).filter(KeywordSearch.is_active == True)]
+            states = {source: load_poll_state(db, source, keyword_ids) for source in self.data_manager.keyword_sources}
+        finally:
+            db.close()
+        now = datetime.now(timezone.utc)
+        for slot, keyword_id in enumerate(keyword_ids):
+            for source in self.data_manager.keyword_sources:
+                state = states[source].get(keyword_id)
+                next_poll_at = due_at(state)
+                if next_poll_at is None or next_poll_at <= now:
+                    next_poll_at = now + self.interval * slot / len(keyword_ids)
+                self._schedule_poll(keyword_id, source, next_poll_at)
+        
+        # The shared feeds are cheap to revalidate, so their first cycle runs at startup
         self.scheduler.add_job(
-            func=self.fetch_all_keywords_mentions,
-            trigger=IntervalTrigger(hours=1),
-            id='fetch_keywords_mentions',
-            name='Fetch mentions with sentiment analysis and spike detection',
+            func=self.fetch_feed_mentions,
+            trigger=IntervalTrigger(seconds=self.interval.total_seconds(), jitter=self.jitter_seconds),
+            id='fetch_feed_mentions',
+            name='Fetch shared feeds for all keywords',
+            next_run_time=now,
             replace_existing=True
         )
         
-        self.scheduler.start()
-        logger.info("Background scheduler started - runs immediately then every hour")
+        self.scheduler.add_job(
+            func=self.warm_topics,
+            id='warm_topics',
+            name='Rebuild trending topics from stored mentions',
+            next_run_time=datetime.now(timezone.utc)
+        )
+        self.scheduler.add_job(
+            func=self.warm_url_filter,
+            id='warm_url_filter',
+            name='Load the URL filter from stored mentions',
+            next_run_time=datetime.now(timezone.utc)
+        )
+        self.scheduler.add_job(
+            func=self.warm_near_duplicates,
+            id='warm_near_duplicates',
+            name='Index recent mentions for near-duplicate detection',
+            next_run_time=datetime.now(timezone.utc)
+        )
+        self.scheduler.add_job(
+            func=self.flush_topics,
+            trigger=IntervalTrigger(minutes=TOPIC_FLUSH_MINUTES),
+            id='flush_topics',
+            name='Flush trending topics',
+            replace_existing=True
+        )
+        
+        logger.info(f"Background scheduler started - {len(keyword_ids)} keyword jobs spread over {self.interval}")
     
     def stop(self):
         """Stop the scheduler"""
-        self.scheduler.shutdown()
+        # Waiting would deadlock: shutdown holds the jobstore lock while it joins
+        # running jobs, and a running poll needs that lock to schedule its successor
+        self.scheduler.shutdown(wait=False)
+        self.data_manager.shutdown()
         logger.info("Background scheduler stopped")
 
+# One fetch engine for the API and the scheduler, so its concurrency limits hold process-wide
+data_source_manager = DataSourceManager(ingest=ingest_queue)
+
 # Global instance
-task_runner = BackgroundTaskRunner()
\ No newline at end of file
+task_runner = BackgroundTaskRunner(data_manager=data_source_manager)
\ No newline at end of file
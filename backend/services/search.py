@@ -0,0 +1,132 @@
+from typing import List, Optional, Tuple
+import logging
+import re
+import threading
+
+from sqlalchemy import column, func, literal_column, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session
+
+from models import Mention
+
+logger = logging.getLogger(__name__)
+
+# SQLite: external-content FTS5 table kept in sync with mentions by triggers
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS mentions_fts USING fts5(text, content='mentions', content_rowid='id')",
+    """CREATE TRIGGER IF NOT EXISTS mentions_fts_ai AFTER INSERT ON mentions BEGIN
+        INSERT INTO mentions_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS mentions_fts_ad AFTER DELETE ON mentions BEGIN
+        INSERT INTO mentions_fts(mentions_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS mentions_fts_au AFTER UPDATE OF text ON mentions BEGIN
+        INSERT INTO mentions_fts(mentions_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO mentions_fts(rowid, text) VALUES (new.id, new.text);
+    END"""
+]
+
+# Postgres: generated tsvector column with a GIN index, maintained by the database
+POSTGRES_FTS_DDL = [
+    "ALTER TABLE mentions ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', coalesce(text, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_mentions_search_vector ON mentions USING GIN (search_vector)"
+]
+
+mentions_fts = table("mentions_fts", column("rowid"), column("rank"))
+search_vector = literal_column("mentions.search_vector")
+
+_enabled = {}
+_enabled_lock = threading.Lock()
+
+def setup_full_text_search(engine: Engine) -> bool:
+    """Create the full-text index for the engine's dialect. Returns False when unsupported"""
+    dialect = engine.dialect.name
+    try:
+        with engine.begin() as conn:
+            if dialect == "sqlite":
+                exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'mentions_fts'")).first()
+                for statement in SQLITE_FTS_DDL:
+                    conn.execute(text(statement))
+                if not exists:
+                    # Index mentions stored before the FTS table existed
+                    conn.execute(text("INSERT INTO mentions_fts(mentions_fts) VALUES ('rebuild')"))
+            elif dialect == "postgresql":
+                for statement in POSTGRES_FTS_DDL:
+                    conn.execute(text(statement))
+            else:
+                return False
+    except Exception as e:
+        logger.warning(f"Full-text search unavailable, falling back to substring search: {e}")
+        return False
+    
+    with _enabled_lock:
+        _enabled[str(engine.url)] = True
+    return True
+
+def full_text_enabled(db: Session) -> bool:
+    """Whether the full-text index exists for the session's database, checked once per process"""
+    bind = db.get_bind()
+    key = str(bind.url)
+    with _enabled_lock:
+        if key in _enabled:
+            return _enabled[key]
+    
+    dialect = bind.dialect.name
+    if dialect == "sqlite":
+        enabled = db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'mentions_fts'")).first() is not None
+    elif dialect == "postgresql":
+        enabled = db.execute(text(
+            "SELECT 1 FROM information_schema.columns WHERE table_name = 'mentions' AND column_name = 'search_vector'"
+        )).first() is not None
+    else:
+        enabled = False
+    
+    with _enabled_lock:
+        _enabled[key] = enabled
+    return enabled
+
+def parse_search_query(q: str) -> List[Tuple[List[str], bool]]:
+    """Split user input into terms: "quoted phrases", prefix* words and plain words.
+    Each term is (words, is_prefix); every term must match"""
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', q):
+        if phrase:
+            words = re.findall(r"\w+", phrase)
+            if words:
+                terms.append((words, False))
+        else:
+            words = re.findall(r"\w+", word)
+            if words:
+                terms.append((words, word.endswith("*") and len(words) == 1))
+    return terms
+
+def _sqlite_match(terms: List[Tuple[List[str], bool]]) -> str:
+    return " ".join('"' + " ".join(words) + '"' + ("*" if is_prefix else "") for words, is_prefix in terms)
+
+def _postgres_tsquery(terms: List[Tuple[List[str], bool]]) -> str:
+    parts = []
+    for words, is_prefix in terms:
+        if is_prefix:
+            parts.append(f"{words[0]}:*")
+        else:
+            parts.append("(" + " <-> ".join(words) + ")" if len(words) > 1 else words[0])
+    return " & ".join(parts)
+
+def apply_text_search(query: Query, db: Session, q: str) -> Tuple[Query, Optional[object]]:
+    """Filter query by q using the full-text index when there is one.
+    Returns the filtered query and an expression to order by relevance (None without an index)"""
+    terms = parse_search_query(q)
+    if not terms or not full_text_enabled(db):
+        return query.filter(Mention.text.contains(q)), None
+    
+    if db.get_bind().dialect.name == "sqlite":
+        query = query.join(mentions_fts, mentions_fts.c.rowid == Mention.id).filter(
+            literal_column("mentions_fts").op("MATCH")(_sqlite_match(terms))
+        )
+        # FTS5 rank is bm25, lower is more relevant
+        return query, mentions_fts.c.rank
+    
+    tsquery = func.to_tsquery("english", _postgres_tsquery(terms))
+    query = query.filter(search_vector.op("@@")(tsquery))
+    return query, -func.ts_rank(search_vector, tsquery)
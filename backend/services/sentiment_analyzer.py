@@ -1,29 +1,107 @@
-from textblob import TextBlob
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+import multiprocessing
+import os
 import re
-from typing import Tuple
+import threading
+from typing import List, Optional, Tuple
+from services.sentiment_cache import SentimentCache, sentiment_cache
+
+# Bump whenever scoring changes so cached results from older models are not reused
+ANALYZER_VERSION = "vader-textblob-1"
+
+# Engine tiers: "fast" is VADER only, "ensemble" is VADER + TextBlob, and
+# "accurate" runs the ensemble only on texts long enough to benefit from it
+ENGINES = ("fast", "ensemble", "accurate")
+SENTIMENT_ENGINE = os.getenv("SENTIMENT_ENGINE", "ensemble")
+SENTIMENT_LONG_TEXT_WORDS = int(os.getenv("SENTIMENT_LONG_TEXT_WORDS", "20"))
+
+# Batch scoring: process count (0 = one per CPU), the smallest batch worth
+# shipping to the pool, and the start method for worker processes
+SENTIMENT_WORKERS = int(os.getenv("SENTIMENT_WORKERS", "0"))
+SENTIMENT_PARALLEL_MIN_BATCH = int(os.getenv("SENTIMENT_PARALLEL_MIN_BATCH", "64"))
+SENTIMENT_MP_CONTEXT = os.getenv("SENTIMENT_MP_CONTEXT", "spawn")
+
+# TextBlob pulls NLTK into memory, so it is only imported once a tier needs it
+_TextBlob = None
+
+def _textblob(text: str):
+    global _TextBlob
+    if _TextBlob is None:
+        from textblob import TextBlob
+        _TextBlob = TextBlob
+    return _TextBlob(text)
+
+# One pool per process, shared by every analyzer instance
+_pool = None
+_pool_lock = threading.Lock()
+
+# Analyzer owned by a pool worker, loaded once by the initializer
+_worker_analyzer = None
+
+def _init_worker():
+    global _worker_analyzer
+    _worker_analyzer = SentimentAnalyzer(workers=1, cache=None)
+
+def _score_in_worker(cleaned_text: str, engine: str) -> Tuple[str, float]:
+    return _worker_analyzer._score(cleaned_text, engine)
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(SENTIMENT_MP_CONTEXT),
+                initializer=_init_worker
+            )
+        return _pool
+
+def shutdown_pool():
+    """Stop the shared scoring pool, if one was started"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
 
 class SentimentAnalyzer:
-    def __init__(self):
+    def __init__(self, workers: Optional[int] = None, cache: Optional[SentimentCache] = sentiment_cache, engine: str = SENTIMENT_ENGINE):
         self.vader = SentimentIntensityAnalyzer()
+        self.workers = workers if workers is not None else (SENTIMENT_WORKERS or os.cpu_count() or 1)
+        self.cache = cache if cache is not None and cache.max_entries > 0 else None
+        self.engine = self._check_engine(engine)
     
-    def analyze(self, text: str) -> Tuple[str, float]:
+    def analyze(self, text: str, engine: Optional[str] = None) -> Tuple[str, float]:
         """
-        Analyze sentiment using VADER + TextBlob ensemble
+        Analyze sentiment using the selected engine tier (VADER + TextBlob ensemble by default)
         Returns: (sentiment_label, sentiment_score)
         """
-        cleaned_text = self._clean_text(text)
-        
+        if not self.cache:
+            return self._score(self._clean_text(text), self._check_engine(engine or self.engine))
+        return self.analyze_many([text], engine)[0]
+    
+    def _score(self, cleaned_text: str, engine: str) -> Tuple[str, float]:
+        """Run the engine's models on already cleaned text"""
         # VADER analysis (better for social media)
         vader_scores = self.vader.polarity_scores(cleaned_text)
         vader_compound = vader_scores['compound']
         
-        # TextBlob analysis
-        blob = TextBlob(cleaned_text)
-        textblob_polarity = blob.sentiment.polarity
+        use_textblob = engine == "ensemble" or (
+            engine == "accurate" and len(cleaned_text.split()) >= SENTIMENT_LONG_TEXT_WORDS
+        )
+        
+        if use_textblob:
+            # TextBlob analysis
+            textblob_polarity = _textblob(cleaned_text).sentiment.polarity
+            
+            # Ensemble: weighted average (VADER 70%, TextBlob 30%)
+            final_score = (vader_compound * 0.7) + (textblob_polarity * 0.3)
+        else:
+            final_score = vader_compound
         
-        # Ensemble: weighted average (VADER 70%, TextBlob 30%)
-        final_score = (vader_compound * 0.7) + (textblob_polarity * 0.3)
         final_score = max(-1.0, min(1.0, final_score))
         
         # Convert to label
@@ -36,14 +114,59 @@ class SentimentAnalyzer:
         
         return sentiment, round(final_score, 3)
     
+    def analyze_many(self, texts: List[str], engine: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Analyze a batch of texts, serving repeats from the cache and spreading
+        the rest across the process pool
+        Returns results in input order, identical to calling analyze() on each text
+        """
+        engine = self._check_engine(engine or self.engine)
+        cleaned_texts = [self._clean_text(text) for text in texts]
+        if not self.cache:
+            return self._score_many(cleaned_texts, engine)
+        
+        tag = f"{ANALYZER_VERSION}:{engine}"
+        if engine == "accurate":
+            # Which texts get the ensemble depends on the threshold, so it is part of the key
+            tag = f"{tag}:{SENTIMENT_LONG_TEXT_WORDS}"
+        keys = [SentimentCache.make_key(cleaned_text, tag) for cleaned_text in cleaned_texts]
+        results = self.cache.get_many(dict.fromkeys(keys), ANALYZER_VERSION)
+        
+        # Score each distinct uncached text once
+        pending = {key: cleaned_text for key, cleaned_text in zip(keys, cleaned_texts) if key not in results}
+        if pending:
+            scored = dict(zip(pending, self._score_many(list(pending.values()), engine)))
+            self.cache.put_many(scored, ANALYZER_VERSION)
+            results.update(scored)
+        
+        return [results[key] for key in keys]
+    
+    def _score_many(self, cleaned_texts: List[str], engine: str) -> List[Tuple[str, float]]:
+        if self.workers <= 1 or len(cleaned_texts) < SENTIMENT_PARALLEL_MIN_BATCH:
+            return [self._score(cleaned_text, engine) for cleaned_text in cleaned_texts]
+        
+        chunksize = max(1, len(cleaned_texts) // (self.workers * 4))
+        try:
+            pool = _get_pool(self.workers)
+            return list(pool.map(_score_in_worker, cleaned_texts, repeat(engine), chunksize=chunksize))
+        except BrokenProcessPool:
+            # A worker died; drop the pool so the next batch starts a fresh one
+            shutdown_pool()
+            return [self._score(cleaned_text, engine) for cleaned_text in cleaned_texts]
+    
     def analyze_sentiment(self, text: str) -> dict:
         """Backward compatibility method"""
         sentiment, score = self.analyze(text)
         return {"sentiment": sentiment, "score": score}
     
+    def _check_engine(self, engine: str) -> str:
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown sentiment engine '{engine}', expected one of {', '.join(ENGINES)}")
+        return engine
+    
     def _clean_text(self, text: str) -> str:
         """Remove URLs, mentions, and extra whitespace"""
         text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
         text = re.sub(r'@\w+|#\w+', '', text)
         text = re.sub(r'\s+', ' ', text).strip()
-        return text
\ No newline at end of file
+        return text
@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+import hashlib
+import logging
+import os
+import threading
+
+from database import SessionLocal, dialect_insert
+from models import SentimentCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# In-process LRU size (0 disables caching) and whether results also go to the
+# sentiment_cache table so they survive restarts
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "50000"))
+SENTIMENT_CACHE_PERSIST = os.getenv("SENTIMENT_CACHE_PERSIST", "false").lower() == "true"
+
+# Persistent lookups are chunked to stay under bind-parameter limits
+PERSIST_LOOKUP_CHUNK = 500
+
+class SentimentCache:
+    """Sentiment results keyed by a hash of the cleaned text and the analyzer version"""
+    
+    def __init__(self, max_entries: int = SENTIMENT_CACHE_SIZE, persist: bool = SENTIMENT_CACHE_PERSIST):
+        self.max_entries = max_entries
+        self.persist = persist
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._purged_versions = set()
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(cleaned_text: str, version: str) -> str:
+        return hashlib.sha256(f"{version}\0{cleaned_text}".encode("utf-8")).hexdigest()
+    
+    def get_many(self, keys: Iterable[str], version: str) -> Dict[str, Tuple[str, float]]:
+        """Look keys up in memory, then in the persistent table; counts hits and misses"""
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+                    self.hits += 1
+                else:
+                    missing.append(key)
+        
+        if missing and self.persist:
+            stored = self._load_persistent(missing, version)
+            if stored:
+                self._remember(stored)
+                found.update(stored)
+                with self._lock:
+                    self.persistent_hits += len(stored)
+                missing = [key for key in missing if key not in stored]
+        
+        with self._lock:
+            self.misses += len(missing)
+        return found
+    
+    def put_many(self, results: Dict[str, Tuple[str, float]], version: str):
+        """Store freshly computed results in every tier"""
+        if not results:
+            return
+        self._remember(results)
+        if self.persist:
+            self._store_persistent(results, version)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.persistent_hits + self.misses
+            return {
+                "hits": self.hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.persistent_hits) / lookups, 3) if lookups else 0.0,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "persistent": self.persist
+            }
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def _remember(self, results: Dict[str, Tuple[str, float]]):
+        with self._lock:
+            for key, value in results.items():
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def _load_persistent(self, keys, version: str) -> Dict[str, Tuple[str, float]]:
+        db = SessionLocal()
+        try:
+            self._purge_stale_versions(db, version)
+            found = {}
+            for i in range(0, len(keys), PERSIST_LOOKUP_CHUNK):
+                chunk = keys[i:i + PERSIST_LOOKUP_CHUNK]
+                rows = db.query(SentimentCacheEntry).filter(SentimentCacheEntry.key.in_(chunk))
+                found.update({row.key: (row.sentiment, row.sentiment_score) for row in rows})
+            return found
+        except Exception as e:
+            logger.error(f"Error reading sentiment cache: {e}")
+            return {}
+        finally:
+            db.close()
+    
+    def _store_persistent(self, results: Dict[str, Tuple[str, float]], version: str):
+        db = SessionLocal()
+        try:
+            created_at = datetime.now(timezone.utc)
+            rows = [
+                {"key": key, "version": version, "sentiment": sentiment, "sentiment_score": score, "created_at": created_at}
+                for key, (sentiment, score) in results.items()
+            ]
+            stmt = dialect_insert(db, SentimentCacheEntry.__table__)
+            if hasattr(stmt, "on_conflict_do_nothing"):
+                stmt = stmt.on_conflict_do_nothing(index_elements=["key"])
+            db.execute(stmt, rows)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error writing sentiment cache: {e}")
+        finally:
+            db.close()
+    
+    def _purge_stale_versions(self, db, version: str):
+        """Drop rows written by other analyzer versions, once per version per process"""
+        if version in self._purged_versions:
+            return
+        self._purged_versions.add(version)
+        db.query(SentimentCacheEntry).filter(SentimentCacheEntry.version != version).delete(synchronize_session=False)
+        db.commit()
+
+# Shared by every analyzer in this process
+sentiment_cache = SentimentCache()
@@ -2,7 +2,15 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
-from models import Mention, Alert
+from models import Mention, Alert, MentionHourlyRollup
+
+class DetectionWindow:
+    """Mention counts for the last 25 hours, bucketed by hour, plus the rolling last hour"""
+    
+    def __init__(self, hourly_counts: Dict[datetime, int], recent_total: int, recent_negative: int):
+        self.hourly_counts = hourly_counts
+        self.recent_total = recent_total
+        self.recent_negative = recent_negative
 
 class SpikeDetector:
     def __init__(self, db: Session):
@@ -14,52 +22,66 @@ class SpikeDetector:
     def detect_spikes(self) -> List[Dict[str, Any]]:
         """Detect various types of spikes and return alert data"""
         alerts = []
+        now = datetime.utcnow()
+        window = self._load_window(now)
         
         # Check for mention volume spikes
-        volume_alert = self._check_volume_spike()
+        volume_alert = self._check_volume_spike(window, now)
         if volume_alert:
             alerts.append(volume_alert)
         
         # Check for negative sentiment surges
-        negative_alert = self._check_negative_surge()
+        negative_alert = self._check_negative_surge(window)
         if negative_alert:
             alerts.append(negative_alert)
         
         # Check for high volume periods
-        high_volume_alert = self._check_high_volume()
+        high_volume_alert = self._check_high_volume(window)
         if high_volume_alert:
             alerts.append(high_volume_alert)
         
         return alerts
     
-    def _check_volume_spike(self) -> Dict[str, Any]:
+    def _load_window(self, now: datetime) -> DetectionWindow:
+        """Hourly counts come from the rollups; the rolling last hour is one
+        grouped query over the created_at index"""
+        current_hour = now.replace(minute=0, second=0, microsecond=0)
+        baseline_start = current_hour - timedelta(hours=25)
+        last_hour = now - timedelta(hours=1)
+        
+        hourly_rows = self.db.query(
+            MentionHourlyRollup.hour,
+            func.sum(MentionHourlyRollup.mention_count).label("count")
+        ).filter(
+            MentionHourlyRollup.hour >= baseline_start
+        ).group_by(MentionHourlyRollup.hour).all()
+        
+        recent_rows = self.db.query(
+            Mention.sentiment,
+            func.count(Mention.id).label("count")
+        ).filter(
+            Mention.created_at >= last_hour
+        ).group_by(Mention.sentiment).all()
+        
+        hourly_counts = {row.hour: row.count for row in hourly_rows}
+        recent_total = sum(row.count for row in recent_rows)
+        recent_negative = sum(row.count for row in recent_rows if row.sentiment == "negative")
+        
+        return DetectionWindow(hourly_counts, recent_total, recent_negative)
+    
+    def _check_volume_spike(self, window: DetectionWindow, now: datetime) -> Dict[str, Any]:
         """Check for unusual spikes in mention volume"""
-        now = datetime.utcnow()
         current_hour = now.replace(minute=0, second=0, microsecond=0)
-        previous_hour = current_hour - timedelta(hours=1)
         baseline_start = current_hour - timedelta(hours=25)  # 24h + 1h for comparison
-        baseline_end = current_hour - timedelta(hours=1)
         
         # Get current hour count
-        current_count = self.db.query(Mention).filter(
-            and_(
-                Mention.created_at >= current_hour,
-                Mention.created_at < current_hour + timedelta(hours=1)
-            )
-        ).count()
+        current_count = window.hourly_counts.get(current_hour, 0)
         
         # Get baseline average (last 24 hours)
-        baseline_counts = []
-        for i in range(24):
-            hour_start = baseline_start + timedelta(hours=i)
-            hour_end = hour_start + timedelta(hours=1)
-            count = self.db.query(Mention).filter(
-                and_(
-                    Mention.created_at >= hour_start,
-                    Mention.created_at < hour_end
-                )
-            ).count()
-            baseline_counts.append(count)
+        baseline_counts = [
+            window.hourly_counts.get(baseline_start + timedelta(hours=i), 0)
+            for i in range(24)
+        ]
         
         if not baseline_counts:
             return None
@@ -82,45 +104,34 @@ class SpikeDetector:
         
         return None
     
-    def _check_negative_surge(self) -> Dict[str, Any]:
+    def _check_negative_surge(self, window: DetectionWindow) -> Dict[str, Any]:
         """Check for surge in negative sentiment"""
-        now = datetime.utcnow()
-        last_hour = now - timedelta(hours=1)
-        
-        # Get mentions from last hour
-        recent_mentions = self.db.query(Mention).filter(
-            Mention.created_at >= last_hour
-        ).all()
+        total_count = window.recent_total
         
-        if len(recent_mentions) < 10:  # Need minimum sample size
+        if total_count < 10:  # Need minimum sample size
             return None
         
-        negative_count = sum(1 for m in recent_mentions if m.sentiment == "negative")
-        negative_ratio = negative_count / len(recent_mentions)
+        negative_count = window.recent_negative
+        negative_ratio = negative_count / total_count
         
         if negative_ratio >= self.negative_surge_threshold:
             return {
                 "type": "negative_surge",
                 "message": f"High negative sentiment detected: {negative_ratio:.0%} of recent mentions",
                 "severity": "critical" if negative_ratio > 0.8 else "warning",
-                "mention_count": len(recent_mentions),
+                "mention_count": total_count,
                 "alert_metadata": {
                     "negative_count": negative_count,
-                    "total_count": len(recent_mentions),
+                    "total_count": total_count,
                     "negative_ratio": negative_ratio
                 }
             }
         
         return None
     
-    def _check_high_volume(self) -> Dict[str, Any]:
+    def _check_high_volume(self, window: DetectionWindow) -> Dict[str, Any]:
         """Check for high volume periods"""
-        now = datetime.utcnow()
-        last_hour = now - timedelta(hours=1)
-        
-        count = self.db.query(Mention).filter(
-            Mention.created_at >= last_hour
-        ).count()
+        count = window.recent_total
         
         if count >= self.high_volume_threshold:
             return {
@@ -134,4 +145,4 @@ class SpikeDetector:
                 }
             }
         
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,259 @@
+"""
+Trending topics: hashtags and key phrases are extracted from every ingested
+mention and counted with Space-Saving sketches over a sliding window of
+time buckets, so memory stays at TOPIC_WINDOW_BUCKETS * TOPIC_SKETCH_SIZE
+phrases however many distinct phrases arrive. The window's top
+TOPIC_TOP_K phrases are flushed into the topics table periodically.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import heapq
+import logging
+import os
+import re
+import threading
+
+from sqlalchemy.orm import Session
+
+from models import KeywordSearch, Mention, Topic
+
+logger = logging.getLogger(__name__)
+
+# The window spans TOPIC_WINDOW_HOURS, split into TOPIC_WINDOW_BUCKETS buckets
+# of one sketch each; sketches track at most TOPIC_SKETCH_SIZE phrases
+TOPIC_WINDOW_HOURS = float(os.getenv("TOPIC_WINDOW_HOURS", "24"))
+TOPIC_WINDOW_BUCKETS = int(os.getenv("TOPIC_WINDOW_BUCKETS", "24"))
+TOPIC_SKETCH_SIZE = int(os.getenv("TOPIC_SKETCH_SIZE", "2000"))
+TOPIC_TOP_K = int(os.getenv("TOPIC_TOP_K", "50"))
+TOPIC_FLUSH_MINUTES = float(os.getenv("TOPIC_FLUSH_MINUTES", "5"))
+
+# Phrases stored on each mention, and the longest phrase counted
+TOPICS_PER_MENTION = 5
+MAX_PHRASE_WORDS = 3
+
+HASHTAG_RE = re.compile(r"#(\w{2,50})")
+WORD_RE = re.compile(r"[a-z0-9][a-z0-9'+.-]*[a-z0-9+]|[a-z]")
+# Phrases do not run across punctuation
+CLAUSE_RE = re.compile(r"[.,;:!?()\[\]{}\"|/\n]+|\s[-–—]+\s")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are aren't as at be because been before being below
+between both but by can can't cannot could couldn't did didn't do does doesn't doing don't down during each
+even ever every few for from further get gets got had hadn't has hasn't have haven't having he he'd he'll he's
+her here here's hers herself him himself his how how's however i i'd i'll i'm i've if in into is isn't it it's
+its itself just let's like made make many may me might more most much must mustn't my myself need new no nor
+not now of off on once one only or other ought our ours ourselves out over own really same say says see she
+she'd she'll she's should shouldn't since so some still such than that that's the their theirs them themselves
+then there there's these they they'd they'll they're they've thing things think this those though through to
+too under until up upon us use used using very via want was wasn't way we we'd we'll we're we've well were
+weren't what what's when when's where where's whether which while who who's whom why why's will with won't
+would wouldn't yes yet you you'd you'll you're you've your yours yourself yourselves
+http https www com amp rt lol im dont cant ive youre
+""".split())
+
+def extract_topics(text: str, limit: int = TOPICS_PER_MENTION) -> List[str]:
+    """Hashtags first, then key phrases: runs of up to MAX_PHRASE_WORDS words between stopwords.
+    Longer runs contribute their leading words; phrases are lowercased and unique"""
+    if not text:
+        return []
+    lowered = re.sub(r"https?://\S+", " ", text.lower())
+    
+    topics = [f"#{tag}" for tag in HASHTAG_RE.findall(lowered)]
+    lowered = HASHTAG_RE.sub(" ", lowered)
+    for clause in CLAUSE_RE.split(lowered):
+        run = []
+        for word in WORD_RE.findall(clause) + [""]:
+            if word and word not in STOPWORDS and not word.isdigit() and len(word) > 2:
+                run.append(word)
+                continue
+            if run:
+                topics.append(" ".join(run[:MAX_PHRASE_WORDS]))
+                run = []
+    
+    # Multi-word phrases and hashtags say more than single words, so they go first
+    ranked = sorted(dict.fromkeys(topics), key=lambda topic: (not topic.startswith("#"), " " not in topic))
+    return ranked[:limit]
+
+def format_topics(topics: List[str], max_length: int = 200) -> str:
+    """Comma-separated topics that fit the mentions.topics column"""
+    value = ""
+    for topic in topics:
+        candidate = f"{value},{topic}" if value else topic
+        if len(candidate) > max_length:
+            break
+        value = candidate
+    return value
+
+class SpaceSaving:
+    """Space-Saving heavy hitters: at most capacity counters; a new phrase takes over the smallest one.
+    Counts overestimate by at most the inherited error, which is kept per phrase"""
+    
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        # phrase -> [count, error, sentiment_sum, observations, last_seen]
+        self.counters: Dict[str, list] = {}
+        # Lazy min-heap of (count, phrase); entries whose count is stale are skipped
+        self._heap: List[Tuple[int, str]] = []
+    
+    def add(self, phrase: str, sentiment_score: float, seen_at: datetime):
+        counter = self.counters.get(phrase)
+        if counter is None:
+            if len(self.counters) < self.capacity:
+                counter = self.counters[phrase] = [0, 0, 0.0, 0, seen_at]
+            else:
+                smallest = self._pop_min()
+                floor = self.counters.pop(smallest)[0]
+                counter = self.counters[phrase] = [floor, floor, 0.0, 0, seen_at]
+        counter[0] += 1
+        counter[2] += sentiment_score
+        counter[3] += 1
+        counter[4] = max(counter[4], seen_at)
+        heapq.heappush(self._heap, (counter[0], phrase))
+        if len(self._heap) > self.capacity * 4:
+            self._heap = [(values[0], key) for key, values in self.counters.items()]
+            heapq.heapify(self._heap)
+    
+    def _pop_min(self) -> str:
+        while True:
+            count, phrase = heapq.heappop(self._heap)
+            counter = self.counters.get(phrase)
+            if counter is not None and counter[0] == count:
+                return phrase
+
+class TopicTracker:
+    """Sliding window of Space-Saving sketches, one per time bucket, keyed by mention created_at"""
+    
+    def __init__(self, window_hours: float = TOPIC_WINDOW_HOURS, buckets: int = TOPIC_WINDOW_BUCKETS,
+                 sketch_size: int = TOPIC_SKETCH_SIZE, top_k: int = TOPIC_TOP_K):
+        self.buckets = max(1, buckets)
+        self.bucket_seconds = window_hours * 3600 / self.buckets
+        self.sketch_size = sketch_size
+        self.top_k = top_k
+        self._sketches: Dict[int, SpaceSaving] = {}
+        self._lock = threading.Lock()
+        # Mentions inserted before this are not seen by observe(), only by warm()
+        self.started_at = datetime.now(timezone.utc)
+        self.observed = 0
+        self.flushes = 0
+    
+    def _bucket_of(self, value: datetime) -> int:
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() // self.bucket_seconds)
+    
+    def _current_bucket(self) -> int:
+        return self._bucket_of(datetime.now(timezone.utc))
+    
+    def _expire(self, current: int):
+        for bucket in [bucket for bucket in self._sketches if bucket <= current - self.buckets]:
+            del self._sketches[bucket]
+    
+    def observe(self, mentions: Iterable[Dict[str, Any]]):
+        """Count the topics of freshly inserted mentions (dicts with topics, sentiment_score and created_at).
+        Mentions older than the window, or dated in the future, are not counted"""
+        with self._lock:
+            current = self._current_bucket()
+            self._expire(current)
+            for mention in mentions:
+                topics = mention.get("topics")
+                created_at = mention.get("created_at")
+                if not topics or created_at is None:
+                    continue
+                bucket = self._bucket_of(created_at)
+                if not current - self.buckets < bucket <= current:
+                    continue
+                
+                sketch = self._sketches.get(bucket)
+                if sketch is None:
+                    sketch = self._sketches[bucket] = SpaceSaving(self.sketch_size)
+                seen_at = created_at.replace(tzinfo=None) if created_at.tzinfo else created_at
+                for topic in topics.split(","):
+                    sketch.add(topic, mention.get("sentiment_score") or 0.0, seen_at)
+                self.observed += 1
+    
+    def top(self, limit: Optional[int] = None, exclude: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """The window's heaviest phrases with mention_count, last_mentioned and sentiment_avg"""
+        excluded = {phrase.lower() for phrase in exclude}
+        with self._lock:
+            self._expire(self._current_bucket())
+            totals: Dict[str, list] = {}
+            for sketch in self._sketches.values():
+                for phrase, (count, _, sentiment_sum, observations, last_seen) in sketch.counters.items():
+                    if phrase in excluded:
+                        continue
+                    total = totals.setdefault(phrase, [0, 0.0, 0, last_seen])
+                    total[0] += count
+                    total[1] += sentiment_sum
+                    total[2] += observations
+                    total[3] = max(total[3], last_seen)
+        
+        ranked = heapq.nlargest(limit or self.top_k, totals.items(), key=lambda item: item[1][0])
+        return [
+            {
+                "name": phrase[:100],
+                "mention_count": count,
+                "last_mentioned": last_seen,
+                "sentiment_avg": round(sentiment_sum / observations, 3) if observations else None
+            }
+            for phrase, (count, sentiment_sum, observations, last_seen) in ranked
+        ]
+    
+    def warm(self, db: Session, batch_size: int = 5000) -> int:
+        """Count mentions stored in the window before this process started. Returns the mentions read"""
+        since = datetime.now(timezone.utc) - timedelta(seconds=self.bucket_seconds * self.buckets)
+        query = db.query(Mention.topics, Mention.sentiment_score, Mention.created_at).filter(
+            Mention.created_at >= since.replace(tzinfo=None),
+            Mention.inserted_at < self.started_at.replace(tzinfo=None),
+            Mention.topics != ""
+        ).execution_options(yield_per=batch_size)
+        
+        count = 0
+        batch = []
+        for topics, sentiment_score, created_at in query:
+            batch.append({"topics": topics, "sentiment_score": sentiment_score, "created_at": created_at})
+            if len(batch) >= batch_size:
+                self.observe(batch)
+                count += len(batch)
+                batch = []
+        self.observe(batch)
+        return count + len(batch)
+    
+    def flush(self, db: Session) -> int:
+        """Replace the topics table with the window's current top K. Returns the number of topics written.
+        Tracked keywords are left out, since every mention of a keyword contains it"""
+        keywords = [keyword for (keyword,) in db.query(KeywordSearch.keyword).filter(KeywordSearch.is_active == True)]
+        top = self.top(exclude=keywords)
+        
+        existing = {topic.name: topic for topic in db.query(Topic)}
+        written = set()
+        for entry in top:
+            # Truncated names can collide; the heavier phrase wins
+            if entry["name"] in written:
+                continue
+            written.add(entry["name"])
+            topic = existing.pop(entry["name"], None)
+            if topic is None:
+                db.add(Topic(**entry))
+            else:
+                topic.mention_count = entry["mention_count"]
+                topic.last_mentioned = entry["last_mentioned"]
+                topic.sentiment_avg = entry["sentiment_avg"]
+        for topic in existing.values():
+            db.delete(topic)
+        db.commit()
+        
+        with self._lock:
+            self.flushes += 1
+        return len(written)
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "observed": self.observed,
+                "flushes": self.flushes,
+                "buckets": len(self._sketches),
+                "phrases": sum(len(sketch.counters) for sketch in self._sketches.values())
+            }
+
+# Fed by every ingest path and flushed by the scheduler
+topic_tracker = TopicTracker()
@@ -0,0 +1,323 @@
+"""
+URL-seen filter: a Bloom filter over the canonical URL of every stored
+mention, so candidates that were never stored skip the database lookup. It
+is warmed from the mentions table in the background at startup and, with
+URL_FILTER_PATH set, saved on shutdown so the next start only reads mentions
+added since.
+
+Fetches and bulk imports trust a positive outright: at the default error rate
+about one unseen URL in a million is dropped, in exchange for never querying
+for known URLs. Mentions created through the API confirm positives with an
+indexed lookup instead. Until warming finishes every candidate is looked up,
+under both its raw and canonical spelling.
+
+Rows stored before canonicalization keep their original URL. Rewrite them
+through the ingest writer with:
+    python -m services.url_filter canonicalize
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import hashlib
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import urllib.parse
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import Mention
+
+logger = logging.getLogger(__name__)
+
+# Sized for at least URL_FILTER_CAPACITY URLs (twice the stored count if that
+# is larger) at a false-positive rate of URL_FILTER_ERROR_RATE. Leave
+# URL_FILTER_PATH empty to rebuild from the database on every start
+URL_FILTER_CAPACITY = int(os.getenv("URL_FILTER_CAPACITY", "1000000"))
+URL_FILTER_ERROR_RATE = float(os.getenv("URL_FILTER_ERROR_RATE", "0.000001"))
+URL_FILTER_PATH = os.getenv("URL_FILTER_PATH", "")
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "ref_url", "referrer", "share_id", "si", "spm", "_ga", "_gl"
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "hsa_")
+
+# Mirrors of reddit.com that serve the same permalinks
+REDDIT_HOSTS = {"reddit.com", "old.reddit.com", "new.reddit.com", "np.reddit.com", "m.reddit.com", "i.reddit.com"}
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def canonical_url(url: str) -> str:
+    """Normalize url so equivalent links compare equal: lowercase scheme and host, no www. prefix,
+    default port, fragment, tracking parameters or trailing slash, sorted query, reddit mirrors as reddit.com.
+    Values that are not absolute http(s) URLs are returned stripped but otherwise unchanged"""
+    url = (url or "").strip()
+    try:
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+    
+    host = parts.hostname.rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    if host in REDDIT_HOSTS:
+        host = "reddit.com"
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+    
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+    
+    params = [
+        (key, value) for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query = urllib.parse.urlencode(sorted(params))
+    return urllib.parse.urlunsplit((scheme, host, path, query, ""))
+
+def canonicalize_stored_urls(db: Session, after_id: int = 0, batch_size: int = 5000) -> Tuple[int, int]:
+    """Rewrite the non-canonical URLs among the next batch_size mentions after after_id and commit.
+    A row whose canonical URL is already taken keeps its URL, since the other row already answers
+    lookups for it. Returns (last id read, rows rewritten); the last id is 0 once no rows are left"""
+    rows = db.query(Mention.id, Mention.url).filter(Mention.id > after_id).order_by(Mention.id).limit(batch_size).all()
+    if not rows:
+        return 0, 0
+    batch = {}
+    for mention_id, url in rows:
+        canonical = canonical_url(url)
+        if canonical != url:
+            batch[mention_id] = canonical
+    
+    wanted = list(dict.fromkeys(batch.values()))
+    taken = set()
+    for j in range(0, len(wanted), 500):
+        taken.update(url for (url,) in db.query(Mention.url).filter(Mention.url.in_(wanted[j:j + 500])))
+    updates = []
+    for mention_id, url in batch.items():
+        if url not in taken:
+            taken.add(url)
+            updates.append({"id": mention_id, "url": url})
+    try:
+        if updates:
+            db.bulk_update_mappings(Mention, updates)
+        db.commit()
+        return rows[-1][0], len(updates)
+    except IntegrityError:
+        # Another process stored one of these URLs meanwhile; go row by row
+        db.rollback()
+    renamed = 0
+    for update in updates:
+        try:
+            db.bulk_update_mappings(Mention, [update])
+            db.commit()
+            renamed += 1
+        except IntegrityError:
+            db.rollback()
+    return rows[-1][0], renamed
+
+class BloomFilter:
+    """Fixed-size Bloom filter; bit positions come from double hashing one BLAKE2b digest"""
+    
+    def __init__(self, capacity: int, error_rate: float, bits: Optional[bytearray] = None, count: int = 0):
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bits = bits if bits is not None else bytearray((self.size + 7) // 8)
+        self.count = count
+    
+    def _positions(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+    
+    def add(self, key: str):
+        """Set key's bits; count only grows for keys that were not already present"""
+        new = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                new = True
+        self.count += new
+    
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class UrlFilter:
+    """Canonical URLs of stored mentions, shared by every ingest path"""
+    
+    def __init__(self, capacity: int = URL_FILTER_CAPACITY, error_rate: float = URL_FILTER_ERROR_RATE, path: str = URL_FILTER_PATH):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.path = path
+        self.bloom = BloomFilter(capacity, error_rate)
+        # Highest mention id already added, so a saved filter only needs newer rows
+        self.max_id = 0
+        self.ready = False
+        # URLs stored while warming, added once the final filter is in place
+        self._pending: List[str] = []
+        self._lock = threading.Lock()
+        
+        self.checked = 0
+        self.rejected = 0
+        self.false_positives = 0
+    
+    def split(self, urls: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """Separate canonical URLs into (unseen, maybe seen). Only meaningful once ready"""
+        unseen, seen = [], []
+        for url in urls:
+            (seen if url in self.bloom else unseen).append(url)
+        return unseen, seen
+    
+    def find_stored(self, db: Session, urls: Dict[str, Iterable[str]], chunk_size: int = 500, confirm: bool = False) -> Set[str]:
+        """The canonical URLs in urls (canonical URL -> raw spellings it came from) that are already stored.
+        Once ready the filter's positives are returned without a query, or with confirm looked up first;
+        before that every URL is looked up. Lookups include raw spellings, since stored rows may not
+        have been canonicalized"""
+        ready = self.ready
+        candidates = self.split(urls)[1] if ready else list(urls)
+        if ready and not confirm:
+            with self._lock:
+                self.checked += len(urls)
+                self.rejected += len(candidates)
+            return set(candidates)
+        
+        lookup = {}
+        for url in candidates:
+            lookup[url] = url
+            for raw in urls[url]:
+                lookup.setdefault(raw, url)
+        keys = list(lookup)
+        found = set()
+        for i in range(0, len(keys), chunk_size):
+            chunk = keys[i:i + chunk_size]
+            found.update(lookup[url] for (url,) in db.query(Mention.url).filter(Mention.url.in_(chunk)))
+        
+        if ready:
+            with self._lock:
+                self.checked += len(urls)
+                self.rejected += len(found)
+                self.false_positives += len(candidates) - len(found)
+        return found
+    
+    def add(self, urls: Iterable[str]):
+        """Record canonical URLs that were just stored"""
+        with self._lock:
+            if not self.ready:
+                self._pending.extend(urls)
+                return
+            before = self.bloom.count
+            for url in urls:
+                self.bloom.add(url)
+            if before <= self.bloom.capacity < self.bloom.count:
+                logger.warning(f"URL filter holds {self.bloom.count} URLs, over its capacity of {self.bloom.capacity}; "
+                               "raise URL_FILTER_CAPACITY or restart to resize it")
+    
+    def _load(self, stored: int) -> bool:
+        """Load a saved filter if it was sized for at least the stored mentions"""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "rb") as f:
+                header = json.loads(f.readline())
+                bits = bytearray(f.read())
+            bloom = BloomFilter(header["capacity"], header["error_rate"], bits, header["count"])
+            # Older saved filters hold raw URLs for rows that predate canonicalization
+            if (len(bits) != (bloom.size + 7) // 8 or header["error_rate"] != self.error_rate
+                    or bloom.capacity < max(stored, bloom.count) or not header.get("canonical_urls")):
+                logger.info(f"Saved URL filter at {self.path} does not fit the current settings, rebuilding")
+                return False
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not load URL filter from {self.path}: {e}")
+            return False
+        self.bloom = bloom
+        self.max_id = header["max_id"]
+        return True
+    
+    def warm(self, db: Session, batch_size: int = 5000) -> int:
+        """Load the saved filter or size a new one, add the canonical URL of every mention it has not seen
+        yet and mark it ready. Returns the number of mentions read"""
+        stored = db.query(Mention.id).count()
+        if not self._load(stored):
+            self.bloom = BloomFilter(max(self.capacity, stored * 2), self.error_rate)
+            self.max_id = 0
+        
+        query = db.query(Mention.id, Mention.url).filter(Mention.id > self.max_id).order_by(Mention.id).execution_options(yield_per=batch_size)
+        count = 0
+        for mention_id, url in query:
+            self.bloom.add(canonical_url(url))
+            self.max_id = mention_id
+            count += 1
+        
+        with self._lock:
+            for url in self._pending:
+                self.bloom.add(url)
+            self._pending = []
+            self.ready = True
+        return count
+    
+    def save(self):
+        """Write the filter to URL_FILTER_PATH, if set, for the next start to resume from"""
+        if not self.path or not self.ready:
+            return
+        with self._lock:
+            header = {
+                "capacity": self.bloom.capacity,
+                "error_rate": self.bloom.error_rate,
+                "count": self.bloom.count,
+                "max_id": self.max_id,
+                "canonical_urls": True
+            }
+            bits = bytes(self.bloom.bits)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(header).encode("utf-8") + b"\n")
+                f.write(bits)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save URL filter to {self.path}: {e}")
+    
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "urls": self.bloom.count,
+                "capacity": self.bloom.capacity,
+                "size_bytes": len(self.bloom.bits),
+                "checked": self.checked,
+                "rejected": self.rejected,
+                "false_positives": self.false_positives
+            }
+
+# Shared by every ingest path
+url_filter = UrlFilter()
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["canonicalize"]:
+        print(__doc__)
+        sys.exit(1)
+    
+    from database import create_tables
+    from services.ingest_queue import ingest_queue
+    create_tables()
+    after_id, renamed = 0, 0
+    while True:
+        after_id, count = ingest_queue.run(lambda db, after_id=after_id: canonicalize_stored_urls(db, after_id))
+        renamed += count
+        if not after_id:
+            break
+    ingest_queue.stop()
+    print(f"Canonicalized {renamed} stored mention URLs")